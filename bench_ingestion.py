@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Offline ingestion benchmark
+Runs the full collection pipeline against fake_api_server.py and reports throughput
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fake_api_server import FakeAPIConfig, start_server
+from http_cache import ResponseCache
+from rate_limiter import RateLimiter
+from startup_tracker import StartupTracker
+
+async def run_benchmark(config: FakeAPIConfig, runs: int = 1) -> None:
+    """Ingest from a fresh fake server into a scratch database, once per run"""
+    runner, base_url, server = await start_server(config)
+    workdir = tempfile.mkdtemp(prefix="ingest_bench_")
+    # The fake server ignores credentials, but Crunchbase is skipped without a key;
+    # Product Hunt has no fake endpoint, so it is kept off rather than reaching the real API
+    os.environ['CRUNCHBASE_API_KEY'] = 'fake-server'
+    os.environ.pop('PRODUCT_HUNT_TOKEN', None)
+
+    try:
+        tracker = StartupTracker(
+            db_path=os.path.join(workdir, "startup_data.db"),
+            rate_limiter=RateLimiter(os.path.join(workdir, "rate_limit_state.json")),
+            response_cache=ResponseCache(os.path.join(workdir, "http_cache.db")),
+            github_api=base_url,
+            crunchbase_api=base_url
+        )
+
+        for run in range(1, runs + 1):
+            requests_before = server.stats['requests']
+            started = time.perf_counter()
+            saved = await tracker.ingest_startup_data()
+            elapsed = time.perf_counter() - started
+            requests = server.stats['requests'] - requests_before
+
+            print(f"Run {run}: {saved:,} startups in {elapsed:.2f}s "
+                  f"({saved / elapsed:,.0f} startups/s, {requests} requests, "
+                  f"{tracker.response_cache.hits} cache hits)")
+        print(f"Server stats: {server.stats}")
+        print(f"Scratch files in {workdir}")
+    finally:
+        await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=2, help="later runs exercise cached shards and 304s")
+    parser.add_argument('--repos-per-day', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--mode', choices=['fake', 'replay'], default='fake')
+    parser.add_argument('--cassette-dir', default='cassettes')
+    args = parser.parse_args()
+
+    config = FakeAPIConfig(
+        mode=args.mode, cassette_dir=args.cassette_dir, repos_per_day=args.repos_per_day,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate
+    )
+    asyncio.run(run_benchmark(config, args.runs))
+
+if __name__ == "__main__":
+    main()
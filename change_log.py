@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Change tracking for the startups table
+Triggers record every insert, update and delete under a monotonic sequence number for delta exports
+"""
+
+import logging
+import sqlite3
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# One row per startup: its latest change. seq only ever grows (AUTOINCREMENT), so it works as a sync token
+CHANGE_TABLE = '''
+CREATE TABLE IF NOT EXISTS startup_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    startup_id INTEGER NOT NULL,
+    name TEXT,
+    op TEXT NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+'''
+
+CHANGE_INDEX = "CREATE INDEX IF NOT EXISTS idx_startup_changes_startup ON startup_changes (startup_id)"
+
+def _record(row: str, op: str, replace: bool = True) -> str:
+    """Trigger statements replacing a startup's previous change with a new one"""
+    previous = f"\n    DELETE FROM startup_changes WHERE startup_id = {row}.id;" if replace else ""
+    return f'''{previous}
+    INSERT INTO startup_changes (startup_id, name, op) VALUES ({row}.id, {row}.name, '{op}');'''
+
+def change_triggers(table: str) -> Dict[str, str]:
+    """Trigger definitions recording changes to the table that stores startups"""
+    return {
+        # AUTOINCREMENT never reuses an id, so a new startup has no earlier change to replace
+        'trg_changes_insert': f"AFTER INSERT ON {table} BEGIN {_record('NEW', 'upsert', replace=False)}\nEND",
+        'trg_changes_update': f"AFTER UPDATE ON {table} BEGIN {_record('NEW', 'upsert')}\nEND",
+        'trg_changes_delete': f"AFTER DELETE ON {table} BEGIN {_record('OLD', 'delete')}\nEND",
+    }
+
+def create_change_log(conn: sqlite3.Connection, table: str = 'startups_data'):
+    """Create the change table and triggers, recording existing startups if the table is new
+
+    ``table`` is the table startups are stored in: startups_data, or the
+    legacy startups table while it is being migrated.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'startup_changes'"
+    ).fetchone()
+    conn.execute(CHANGE_TABLE)
+    conn.execute(CHANGE_INDEX)
+    for name, body in change_triggers(table).items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    if not exists:
+        # Startups saved before change tracking count as changed after token 0
+        conn.execute(f'''
+        INSERT INTO startup_changes (startup_id, name, op)
+        SELECT id, name, 'upsert' FROM {table} ORDER BY id
+        ''')
+        logger.info("Started change tracking for startups")
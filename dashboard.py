@@ -9,11 +9,14 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import sqlite3
 import json
 from datetime import datetime, timedelta
 import numpy as np
 
+from dashboard_cache import get_data_cache, get_figure_cache
+from database import get_connection_manager
+from queries import HAS_STARTUPS_QUERY, DashboardFilters, dashboard_breakdown_query, dashboard_startups_query
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="Startup Revenue Insights Tracker",
@@ -386,9 +389,22 @@ label, .stSelectbox label, .stSlider label {
 </style>
 """, unsafe_allow_html=True)
 
+# Professional color palette for categorical charts
+CHART_COLORS = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444', '#8b5cf6',
+                '#06b6d4', '#84cc16', '#f97316', '#ec4899', '#6366f1']
+
 class StartupDashboard:
     def __init__(self, db_path: str = "startup_data.db"):
         self.db_path = db_path
+        self.db = get_connection_manager(db_path)
+        # Shared by every session; reloads only after the database changes
+        self.data_cache = get_data_cache(db_path)
+        self.figure_cache = get_figure_cache()
+        
+        # Rows the revenue/growth scatter plots at most; counts and averages always cover every match
+        self.max_chart_rows = 5000
+        # Upper end of the revenue slider ($K); selecting it means no upper bound
+        self.revenue_slider_max = 10000
         
         # Top 20 opportunities from our analysis with tech stacks
         self.top_opportunities = [
@@ -603,21 +619,49 @@ class StartupDashboard:
             "HealthTech": {"month_1": 2500, "month_6": 18000, "month_12": 60000, "growth_rate": 25},
         }
     
-    def load_data(self) -> pd.DataFrame:
-        """Load startup data from database or create sample data"""
+    def load_data(self, filters: DashboardFilters = DashboardFilters()) -> pd.DataFrame:
+        """Load up to max_chart_rows filtered startups from the database, or from sample data"""
+        query, params = dashboard_startups_query(filters, limit=self.max_chart_rows)
+        return self.data_cache.get(('startups', filters), lambda: self._read(
+            query, params, lambda df: self._filter_sample(df, filters).head(self.max_chart_rows)
+        ))
+    
+    def load_breakdown(self, filters: DashboardFilters = DashboardFilters()) -> pd.DataFrame:
+        """Startup count and revenue total of the filtered startups per industry and stage"""
+        query, params = dashboard_breakdown_query(filters)
+        return self.data_cache.get(('breakdown', filters), lambda: self._read(
+            query, params, lambda df: self._sample_breakdown(self._filter_sample(df, filters))
+        ))
+    
+    def _read(self, query: str, params: dict, from_sample) -> pd.DataFrame:
+        """Run a dashboard query, or derive its result from sample data while the database is empty"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query("SELECT * FROM startups", conn)
-            conn.close()
-            
-            if df.empty:
-                # Create sample data for demonstration
-                df = self.create_sample_data()
-            
-            return df
+            with self.db.reader() as conn:
+                if conn.execute(HAS_STARTUPS_QUERY).fetchone():
+                    return pd.read_sql_query(query, conn, params=params)
         except:
-            # If no database, create sample data
-            return self.create_sample_data()
+            # If no database, use sample data
+            pass
+        return from_sample(self.data_cache.get('sample', self.create_sample_data))
+    
+    def _filter_sample(self, df: pd.DataFrame, filters: DashboardFilters) -> pd.DataFrame:
+        mask = pd.Series(True, index=df.index)
+        if filters.industry is not None:
+            mask &= df['industry'] == filters.industry
+        if filters.stage is not None:
+            mask &= df['stage'] == filters.stage
+        if filters.min_revenue is not None:
+            mask &= df['revenue_estimate'] >= filters.min_revenue
+        if filters.max_revenue is not None:
+            mask &= df['revenue_estimate'] <= filters.max_revenue
+        return df[mask]
+    
+    def _sample_breakdown(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df.groupby(['industry', 'stage'], dropna=False).agg(
+            startup_count=('name', 'size'),
+            revenue_count=('revenue_estimate', 'count'),
+            revenue_sum=('revenue_estimate', 'sum')
+        ).reset_index()
     
     def create_sample_data(self) -> pd.DataFrame:
         """Create sample startup data for demonstration"""
@@ -676,8 +720,9 @@ class StartupDashboard:
         with col4:
             st.metric("Market Size", "$1.2T+", "🌍")
     
+    @st.fragment
     def render_top_opportunities(self):
-        """Render top 20 business opportunities with tech stacks"""
+        """Render top 20 business opportunities with tech stacks; its filters rerun only this section"""
         st.header("🎯 Top 20 Business Opportunities")
         
         # Add filter options
@@ -723,8 +768,9 @@ class StartupDashboard:
                 </div>
                 """, unsafe_allow_html=True)
     
+    @st.fragment
     def render_revenue_projections(self):
-        """Render revenue projection models"""
+        """Render revenue projection models; the industry selection reruns only this section"""
         st.header("📊 Revenue Projection Models")
         
         # Industry selection
@@ -735,6 +781,38 @@ class StartupDashboard:
         
         benchmark = self.revenue_benchmarks[selected_industry]
         
+        # Benchmarks are fixed, so the chart depends on the industry alone
+        self.plot_cached(('revenue_projection', selected_industry),
+                         lambda: self._projection_chart(selected_industry, benchmark))
+        
+        # Display key metrics
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.markdown(f"""
+            <div class="revenue-projection">
+                <h4>Month 1 Revenue</h4>
+                <h2>${benchmark['month_1']:,}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown(f"""
+            <div class="revenue-projection">
+                <h4>Month 6 Revenue</h4>
+                <h2>${benchmark['month_6']:,}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col3:
+            st.markdown(f"""
+            <div class="revenue-projection">
+                <h4>Year 1 Total (ARR)</h4>
+                <h2>${benchmark['month_12']*12:,}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    def _projection_chart(self, selected_industry: str, benchmark: dict) -> go.Figure:
         # Calculate monthly projections
         months = list(range(1, 13))
         growth_rate = benchmark["growth_rate"] / 100 / 12  # Monthly growth rate
@@ -782,102 +860,106 @@ class StartupDashboard:
             yaxis=dict(gridcolor='rgba(229, 231, 235, 0.8)', color='#374151')
         )
         
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Display key metrics
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.markdown(f"""
-            <div class="revenue-projection">
-                <h4>Month 1 Revenue</h4>
-                <h2>${benchmark['month_1']:,}</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f"""
-            <div class="revenue-projection">
-                <h4>Month 6 Revenue</h4>
-                <h2>${benchmark['month_6']:,}</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-            <div class="revenue-projection">
-                <h4>Year 1 Total (ARR)</h4>
-                <h2>${benchmark['month_12']*12:,}</h2>
-            </div>
-            """, unsafe_allow_html=True)
+        return fig
     
-    def render_market_analysis(self, df: pd.DataFrame):
-        """Render market analysis charts"""
+    def render_market_analysis(self, filters: DashboardFilters):
+        """Render market analysis charts for the startups matching the sidebar filters"""
         st.header("📈 Market Analysis")
         
+        # Aggregated in SQLite; only the scatter needs individual startups
+        breakdown = self.load_breakdown(filters)
+        if breakdown.empty:
+            st.info("No startups match the selected filters.")
+            return
+        # Figures are cached per data version and filters, so a rerun rebuilds none of them
+        breakdown_key = (self.data_cache.version(('breakdown', filters)), filters)
+        
         col1, col2 = st.columns(2)
         
         with col1:
             # Industry distribution
-            industry_counts = df['industry'].value_counts()
-            
-            # Professional color palette for pie chart
-            professional_colors = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444', '#8b5cf6', 
-                                 '#06b6d4', '#84cc16', '#f97316', '#ec4899', '#6366f1']
-            
-            fig_pie = px.pie(
-                values=industry_counts.values,
-                names=industry_counts.index,
-                title="Startup Distribution by Industry",
-                template="plotly_dark",
-                color_discrete_sequence=professional_colors
-            )
-            fig_pie.update_layout(
-                paper_bgcolor='white',
-                plot_bgcolor='white',
-                font=dict(color='#111827', size=12),
-                title_font=dict(color='#1e40af', size=14, family="Arial Black")
-            )
-            
-            st.plotly_chart(fig_pie, use_container_width=True)
+            self.plot_cached(('industry_pie',) + breakdown_key, lambda: self._industry_pie(breakdown))
         
         with col2:
-            # Revenue by stage
-            stage_revenue = df.groupby('stage')['revenue_estimate'].mean().sort_values(ascending=True)
-            
-            fig_bar = px.bar(
-                x=stage_revenue.values,
-                y=stage_revenue.index,
-                orientation='h',
-                title="Average Revenue by Stage",
-                template="plotly_white",
-                color=stage_revenue.values,
-                color_continuous_scale=[[0, '#e5e7eb'], [0.5, '#3b82f6'], [1, '#059669']]
-            )
-            fig_bar.update_layout(
-                paper_bgcolor='white',
-                plot_bgcolor='rgba(249, 250, 251, 0.5)',
-                font=dict(color='#111827', size=12),
-                title_font=dict(color='#1e40af', size=14, family="Arial Black"),
-                xaxis=dict(gridcolor='rgba(229, 231, 235, 0.8)', color='#374151'),
-                yaxis=dict(gridcolor='rgba(229, 231, 235, 0.8)', color='#374151')
-            )
-            
-            st.plotly_chart(fig_bar, use_container_width=True)
+            # Revenue by stage; GitHub and Product Hunt startups come without revenue estimates
+            if breakdown['revenue_count'].sum() == 0:
+                st.info("None of the selected startups has a revenue estimate yet.")
+            else:
+                self.plot_cached(('stage_bar',) + breakdown_key, lambda: self._stage_bar(breakdown))
         
         # Revenue vs Growth Rate Scatter
         st.subheader("Revenue vs Growth Rate Analysis")
+        df = self.load_data(filters)
+        total = int(breakdown['startup_count'].sum())
+        if len(df) < total:
+            st.caption(f"Plotting {len(df):,} of {total:,} matching startups")
+        
+        if df['revenue_estimate'].isna().all():
+            st.info("None of the selected startups has a revenue estimate to plot yet.")
+            return
+        self.plot_cached(('revenue_growth_scatter', self.data_cache.version(('startups', filters)), filters),
+                         lambda: self._revenue_growth_scatter(df))
+    
+    def plot_cached(self, key: tuple, build):
+        """Show the figure ``build`` returns, through the shared figure cache"""
+        st.plotly_chart(self.figure_cache.get(key, build), use_container_width=True)
+    
+    def _industry_pie(self, breakdown: pd.DataFrame) -> go.Figure:
+        industry_counts = breakdown.groupby('industry')['startup_count'].sum().sort_values(ascending=False)
         
+        fig_pie = px.pie(
+            values=industry_counts.values,
+            names=industry_counts.index,
+            title="Startup Distribution by Industry",
+            template="plotly_dark",
+            color_discrete_sequence=CHART_COLORS
+        )
+        fig_pie.update_layout(
+            paper_bgcolor='white',
+            plot_bgcolor='white',
+            font=dict(color='#111827', size=12),
+            title_font=dict(color='#1e40af', size=14, family="Arial Black")
+        )
+        
+        return fig_pie
+    
+    def _stage_bar(self, breakdown: pd.DataFrame) -> go.Figure:
+        by_stage = breakdown.groupby('stage')[['revenue_sum', 'revenue_count']].sum()
+        by_stage = by_stage[by_stage['revenue_count'] > 0]
+        stage_revenue = (by_stage['revenue_sum'] / by_stage['revenue_count']).sort_values(ascending=True)
+        
+        fig_bar = px.bar(
+            x=stage_revenue.values,
+            y=stage_revenue.index,
+            orientation='h',
+            title="Average Revenue by Stage",
+            template="plotly_white",
+            color=stage_revenue.values,
+            color_continuous_scale=[[0, '#e5e7eb'], [0.5, '#3b82f6'], [1, '#059669']]
+        )
+        fig_bar.update_layout(
+            paper_bgcolor='white',
+            plot_bgcolor='rgba(249, 250, 251, 0.5)',
+            font=dict(color='#111827', size=12),
+            title_font=dict(color='#1e40af', size=14, family="Arial Black"),
+            xaxis=dict(gridcolor='rgba(229, 231, 235, 0.8)', color='#374151'),
+            yaxis=dict(gridcolor='rgba(229, 231, 235, 0.8)', color='#374151')
+        )
+        
+        return fig_bar
+    
+    def _revenue_growth_scatter(self, df: pd.DataFrame) -> go.Figure:
         fig_scatter = px.scatter(
             df,
             x='revenue_estimate',
             y='growth_rate',
             color='industry',
-            size='funding_raised',
+            # Marker sizes must be numbers; startups without funding data get the smallest
+            size=pd.to_numeric(df['funding_raised']).fillna(0),
             hover_data=['name', 'stage'],
             title="Revenue vs Growth Rate by Industry",
             template="plotly_white",
-            color_discrete_sequence=professional_colors
+            color_discrete_sequence=CHART_COLORS
         )
         
         fig_scatter.update_layout(
@@ -892,7 +974,7 @@ class StartupDashboard:
             yaxis=dict(gridcolor='rgba(229, 231, 235, 0.8)', color='#374151')
         )
         
-        st.plotly_chart(fig_scatter, use_container_width=True)
+        return fig_scatter
     
     def render_success_factors(self):
         """Render success factors analysis"""
@@ -1013,8 +1095,8 @@ class StartupDashboard:
             </div>
             """, unsafe_allow_html=True)
     
-    def render_sidebar(self):
-        """Render sidebar with filters and controls"""
+    def render_sidebar(self) -> DashboardFilters:
+        """Render sidebar with filters and controls, returning the selected filters"""
         with st.sidebar:
             st.header("🎛️ Dashboard Controls")
             
@@ -1030,21 +1112,25 @@ class StartupDashboard:
             
             st.subheader("Market Filters")
             
+            # Options come from the data itself, via the cached unfiltered breakdown
+            breakdown = self.load_breakdown()
+            
             # Industry filter
-            industries = ["All", "SaaS", "AI/ML", "FinTech", "HealthTech", "EdTech", "DevTools", "ClimaTech"]
+            industries = ["All"] + sorted(breakdown['industry'].dropna().unique())
             selected_industry = st.selectbox("Filter by Industry", industries)
             
             # Stage filter
-            stages = ["All", "Pre-Seed", "Seed", "Series A", "Series B", "Growth"]
+            stages = ["All"] + sorted(breakdown['stage'].dropna().unique())
             selected_stage = st.selectbox("Filter by Stage", stages)
             
             # Revenue range
             revenue_range = st.slider(
                 "Revenue Range ($K)",
                 min_value=0,
-                max_value=10000,
-                value=(0, 1000),
-                step=50
+                max_value=self.revenue_slider_max,
+                value=(0, self.revenue_slider_max),
+                step=50,
+                help="The top of the range means no upper limit"
             )
             
             st.subheader("📚 Resources")
@@ -1054,39 +1140,40 @@ class StartupDashboard:
             - [Industry Benchmarks](https://example.com)
             - [Success Stories](https://example.com)
             """)
+        
+        return DashboardFilters(
+            industry=None if selected_industry == "All" else selected_industry,
+            stage=None if selected_stage == "All" else selected_stage,
+            min_revenue=revenue_range[0] * 1000 if revenue_range[0] > 0 else None,
+            max_revenue=revenue_range[1] * 1000 if revenue_range[1] < self.revenue_slider_max else None
+        )
     
     def run(self):
         """Main dashboard rendering function"""
-        # Load data
-        df = self.load_data()
-        
         # Render components
         self.render_header()
-        self.render_sidebar()
+        filters = self.render_sidebar()
         
-        # Main content tabs
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        # Main content tabs; only the selected one runs
+        tabs = st.tabs([
             "🎯 Opportunities", 
             "📊 Revenue Models", 
             "📈 Market Analysis", 
             "🎯 Success Factors",
             "🛠️ Implementation"
-        ])
-        
-        with tab1:
-            self.render_top_opportunities()
-        
-        with tab2:
-            self.render_revenue_projections()
-        
-        with tab3:
-            self.render_market_analysis(df)
-        
-        with tab4:
-            self.render_success_factors()
+        ], key="dashboard_tab", on_change="rerun")
+        sections = [
+            self.render_top_opportunities,
+            self.render_revenue_projections,
+            lambda: self.render_market_analysis(filters),
+            self.render_success_factors,
+            self.render_implementation_guide
+        ]
         
-        with tab5:
-            self.render_implementation_guide()
+        for tab, render in zip(tabs, sections):
+            if tab.open:
+                with tab:
+                    render()
 
 def main():
     """Main function to run the dashboard"""
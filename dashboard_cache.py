@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Process-wide caches for the Streamlit dashboards
+Streamlit re-executes the dashboard script on every rerun, so anything cached there is lost; these caches live in
+an imported module and are shared by every session of the server process: query results in DataCache, built
+Plotly figures in FigureCache
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import plotly.graph_objects as go
+
+from database import ConnectionManager, get_connection_manager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300  # seconds; bounds staleness if a change goes unnoticed, and retries a missing database
+DEFAULT_DATA_CACHE_ENTRIES = 32  # each distinct set of dashboard filters is an entry
+DEFAULT_FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+@dataclass
+class CacheEntry:
+    value: Any
+    data_version: Optional[int]
+    loaded_at: float
+
+class DataCache:
+    """Query results for one database, reloaded only once the database has changed
+
+    Entries are tagged with the database's data_version when loaded and served
+    until it moves on or ``ttl`` seconds pass; beyond ``max_entries`` the least
+    recently used are evicted. Loads are single-flight: of many sessions missing
+    the same key at once, one runs the loader and the rest wait for its result.
+    Cached values are shared, so callers must not mutate them.
+    """
+
+    def __init__(self, db: ConnectionManager, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_DATA_CACHE_ENTRIES):
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        # Only keys being loaded have a lock
+        self._load_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry: Optional[CacheEntry], version: Optional[int]) -> bool:
+        return (entry is not None and entry.data_version == version
+                and time.monotonic() - entry.loaded_at < self.ttl)
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Cached value for ``key``, calling ``load`` if the database changed since it was cached"""
+        version = self.db.data_version()
+        entry = self._lookup(key)
+        if self._fresh(entry, version):
+            self.hits += 1
+            return entry.value
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            # Another session may have loaded it while this one waited
+            entry = self._lookup(key)
+            if self._fresh(entry, version):
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            started = time.perf_counter()
+            try:
+                value = load()
+                # Tagged with the version seen before loading, so a write during the load triggers another
+                self._store(key, CacheEntry(value, version, time.monotonic()))
+            finally:
+                # Sessions already waiting hold the lock; later ones find the entry, or load afresh
+                with self._lock:
+                    self._load_locks.pop(key, None)
+            logger.info(f"Loaded {key} at data version {version} in {time.perf_counter() - started:.3f}s")
+        return value
+
+    def _lookup(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key: Hashable, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def version(self, key: Hashable) -> Optional[int]:
+        """Data version the cached value for ``key`` was loaded at, e.g. to key results derived from it
+
+        Call it right after ``get``: the key is then the most recently used, the last to be evicted.
+        """
+        entry = self._entries.get(key)
+        return entry.data_version if entry else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'loading': len(self._load_locks), 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class FigureCache:
+    """Least-recently-used store of built Plotly figures as JSON, bounded by total size
+
+    Keys must capture everything a figure depends on (the data version and
+    filters it was built from), so entries never go stale and are only evicted.
+    A hit skips the aggregation and Plotly construction in ``build``.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._figures: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], go.Figure]) -> dict:
+        """Figure spec for ``key`` as a dict st.plotly_chart accepts, calling ``build`` on a miss"""
+        with self._lock:
+            spec = self._figures.get(key)
+            if spec is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+        if spec is None:
+            # Concurrent misses may both build; figures are cheap enough next to blocking every session
+            spec = build().to_json(validate=False)
+            with self._lock:
+                self.misses += 1
+                self._store(key, spec)
+        return json.loads(spec)
+
+    def _store(self, key: Hashable, spec: str):
+        if len(spec) > self.max_bytes:
+            return
+        previous = self._figures.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= len(previous)
+        self._figures[key] = spec
+        self.size_bytes += len(spec)
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self._figures.popitem(last=False)
+            self.size_bytes -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'figures': len(self._figures), 'bytes': self.size_bytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+_caches: Dict[str, DataCache] = {}
+_caches_lock = threading.Lock()
+
+def get_data_cache(db_path: str) -> DataCache:
+    """Return the process-wide data cache for a database file"""
+    key = os.path.abspath(db_path)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = DataCache(get_connection_manager(db_path))
+        return _caches[key]
+
+_figure_cache: Optional[FigureCache] = None
+
+def get_figure_cache() -> FigureCache:
+    """Return the process-wide figure cache"""
+    global _figure_cache
+    with _caches_lock:
+        if _figure_cache is None:
+            _figure_cache = FigureCache()
+        return _figure_cache
@@ -146,33 +146,28 @@ def create_enhanced_dashboard():
     # Main header
     create_main_header()
     
-    # Navigation
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+    # Navigation; only the selected page runs, so the data loads behind hidden pages are skipped
+    tabs = st.tabs([
         "📊 Market Overview", 
         "🚀 Enhanced Opportunities", 
         "🎯 Prospect Analysis",
         "🏗️ Development Planner",
         "📈 Market Intelligence",
         "⚙️ Settings"
-    ])
-    
-    with tab1:
-        create_market_overview()
-    
-    with tab2:
-        create_enhanced_opportunities_page()
-    
-    with tab3:
-        create_prospect_analysis_page()
-    
-    with tab4:
-        create_development_planner()
-    
-    with tab5:
-        create_market_intelligence()
-    
-    with tab6:
-        create_settings_page()
+    ], key="enhanced_tab", on_change="rerun")
+    pages = [
+        create_market_overview,
+        create_enhanced_opportunities_page,
+        create_prospect_analysis_page,
+        create_development_planner,
+        create_market_intelligence,
+        create_settings_page
+    ]
+    
+    for tab, page in zip(tabs, pages):
+        if tab.open:
+            with tab:
+                page()
 
 def create_market_overview():
     """Market overview with key metrics"""
@@ -255,6 +250,7 @@ def create_market_overview():
         fig.update_layout(title="Funding Activity by Stage", height=400)
         st.plotly_chart(fig, use_container_width=True)
 
+@st.fragment
 def create_development_planner():
     """Interactive development planning tool"""
     st.header("🏗️ Interactive Development Planner")
@@ -334,6 +330,7 @@ def create_development_planner():
                 for endpoint in plan.api_endpoints:
                     st.code(endpoint, language="http")
 
+@st.fragment
 def create_market_intelligence():
     """Market intelligence and trends analysis"""
     st.header("📈 Market Intelligence Dashboard")
@@ -403,6 +400,7 @@ def create_market_intelligence():
                         title="Market Opportunity Heatmap")
         st.plotly_chart(fig, use_container_width=True)
 
+@st.fragment
 def create_settings_page():
     """Settings and configuration page"""
     st.header("⚙️ Platform Settings & Configuration")
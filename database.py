@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite connections for the tracker and dashboards
+One long-lived writer plus a small pool of read-only readers, all in WAL mode
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "startup_data.db"
+DEFAULT_READERS = 4
+
+# Applied to every connection; WAL lets readers keep reading while the writer commits
+CONNECTION_PRAGMAS = {
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+WRITER_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # durable across application crashes; WAL keeps the file consistent
+}
+
+class ConnectionManager:
+    """Hands out the writer connection and pooled reader connections for one database"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, readers: int = DEFAULT_READERS):
+        self.db_path = db_path
+        self.max_readers = readers
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.RLock()  # one writer at a time, across threads and to_thread calls
+        self._idle_readers: queue.LifoQueue = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(readers)
+        self._readers_lock = threading.Lock()
+        self._open_readers = 0
+        self._probe: Optional[sqlite3.Connection] = None
+        self._probe_lock = threading.Lock()
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        if read_only:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            for pragma, value in WRITER_PRAGMAS.items():
+                conn.execute(f"PRAGMA {pragma} = {value}")
+        for pragma, value in CONNECTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Hold the writer connection exclusively, committing on success and rolling back on error"""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect(read_only=False)
+            with self._writer:
+                yield self._writer
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection, waiting if every pooled reader is in use"""
+        self._reader_slots.acquire()
+        try:
+            try:
+                conn = self._idle_readers.get_nowait()
+            except queue.Empty:
+                conn = self._connect(read_only=True)
+                with self._readers_lock:
+                    self._open_readers += 1
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle_readers.put(conn)
+        finally:
+            self._reader_slots.release()
+
+    def data_version(self) -> Optional[int]:
+        """A number that changes whenever any other connection commits, or None if the database cannot be opened
+
+        PRAGMA data_version is only comparable on the connection that read it,
+        so it comes from one dedicated connection. Reading it costs no I/O
+        beyond the WAL index, which makes it cheap enough to check per request.
+        """
+        with self._probe_lock:
+            try:
+                if self._probe is None:
+                    self._probe = self._connect(read_only=True)
+                return self._probe.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                return None
+
+    def close(self):
+        """Close every idle connection; the manager reopens them on demand"""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._probe_lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+        while True:
+            try:
+                self._idle_readers.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._readers_lock:
+                self._open_readers -= 1
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+def get_connection_manager(db_path: str = DEFAULT_DB_PATH) -> ConnectionManager:
+    """Return the process-wide connection manager for a database file"""
+    key = os.path.abspath(db_path)
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = ConnectionManager(db_path)
+        return _managers[key]
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Entity resolution for startups collected from several sources
+Records resolve to a canonical entity key through source ids and homepage domains; a MinHash/LSH
+index over names and descriptions surfaces near-duplicate entities as merge candidates
+Run directly to list candidates or merge two entities: python entity_resolution.py [db_path] [--merge KEEP MERGED]
+"""
+
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Trailing words that do not tell companies apart ("Acme Inc." is "Acme")
+NAME_SUFFIXES = {'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'company',
+                 'gmbh', 'plc', 'sa', 'ag', 'bv', 'hq', 'io', 'ai', 'app', 'com'}
+
+# Hosts shared by many unrelated projects, so their domain identifies nothing: code, package, model and
+# documentation hosts, site builders and social profiles
+SHARED_HOSTS = frozenset({'github.com', 'github.io', 'gitlab.com', 'gitlab.io', 'bitbucket.org', 'sourceforge.net',
+                'pypi.org', 'npmjs.com', 'npmjs.org', 'crates.io', 'docs.rs', 'rubygems.org', 'pkg.go.dev',
+                'packagist.org', 'nuget.org', 'hub.docker.com', 'huggingface.co', 'readthedocs.io',
+                'readthedocs.org', 'gitbook.io', 'arxiv.org', 'colab.research.google.com', 'sites.google.com',
+                'docs.google.com', 'producthunt.com', 'medium.com', 'substack.com', 'notion.site', 'vercel.app',
+                'netlify.app', 'herokuapp.com', 'pages.dev', 'linktr.ee', 'twitter.com', 'x.com', 'linkedin.com',
+                'facebook.com', 'youtube.com', 'discord.gg', 'discord.com', 't.me', 'apps.apple.com',
+                'play.google.com', 'chrome.google.com', 'marketplace.visualstudio.com'})
+
+# 64 permutations in 16 bands of 4: pairs above ~0.5 Jaccard similarity share a bucket with high probability
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+MERSENNE_PRIME = (1 << 61) - 1
+# Buckets this full hold boilerplate shingles rather than duplicates; skipping them keeps candidates sub-quadratic
+MAX_BUCKET_SIZE = 50
+
+ENTITY_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS entity_aliases (
+        alias TEXT PRIMARY KEY,
+        entity_key TEXT NOT NULL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_entity_aliases_entity ON entity_aliases (entity_key)",
+    # Every record as each source last reported it, so merged entities keep all their provenance
+    '''
+    CREATE TABLE IF NOT EXISTS startup_sources (
+        id INTEGER PRIMARY KEY,
+        source TEXT NOT NULL,
+        source_ref TEXT NOT NULL,
+        entity_key TEXT NOT NULL,
+        name TEXT NOT NULL,
+        homepage TEXT,
+        description TEXT,
+        signature BLOB,
+        seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (source, source_ref)
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_startup_sources_entity ON startup_sources (entity_key)",
+    # Records saved since the last index_unsigned_sources pass
+    "CREATE INDEX IF NOT EXISTS idx_startup_sources_unsigned ON startup_sources (id) WHERE signature IS NULL",
+    '''
+    CREATE TABLE IF NOT EXISTS entity_lsh (
+        band INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        record_id INTEGER NOT NULL
+    )
+    ''',
+    # Serves bucket lookups and walks buckets in order for find_merge_candidates
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_entity_lsh_bucket ON entity_lsh (band, bucket, record_id)",
+    '''
+    CREATE TABLE IF NOT EXISTS entity_merges (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kept_key TEXT NOT NULL,
+        merged_key TEXT NOT NULL,
+        score REAL,
+        reason TEXT,
+        merged_row TEXT,
+        merged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+# Buckets holding more than one record; their members are the merge candidates
+LSH_BUCKETS_QUERY = '''
+SELECT group_concat(record_id) FROM entity_lsh
+GROUP BY band, bucket
+HAVING COUNT(*) BETWEEN 2 AND ?
+'''
+
+# Source records saved since the last index_unsigned_sources pass, oldest first
+UNSIGNED_SOURCES_QUERY = '''
+SELECT id, name, description FROM startup_sources
+WHERE signature IS NULL
+ORDER BY id
+LIMIT ?
+'''
+
+# Columns carried over from a merged startup where the kept one has no value
+MERGE_FILL_COLUMNS = ['industry_id', 'founded_day', 'revenue_estimate', 'growth_rate', 'funding_raised',
+                      'employee_count', 'revenue_model_id', 'stage_id', 'location_id']
+
+SQL_VARIABLE_CHUNK = 500
+DEFAULT_INDEX_CHUNK = 5000  # source records signed per transaction by index_unsigned_sources
+
+@dataclass
+class MergeCandidate:
+    """Two entities whose records look like the same startup"""
+    entity_key: str
+    duplicate_key: str
+    name: str
+    duplicate_name: str
+    score: float
+
+def normalize_name(name: str) -> str:
+    """Casefolded alphanumeric words of a name, without accents or trailing legal/TLD suffixes"""
+    text = name or ''
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    words = re.findall(r'[^\W_]+', text.casefold())
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+# Host of a URL with or without a scheme; urlparse is several times slower and this runs for every record saved
+_URL_HOST = re.compile(r'^(?>(?:[A-Za-z][A-Za-z0-9+.-]*://|//)?)(?:[^/?#@]*@)?([^:/?#\[\]]+)')
+
+def homepage_domain(url: Optional[str]) -> Optional[str]:
+    """Host of a homepage URL without ``www.``; None if missing or on a shared host"""
+    match = _URL_HOST.match(url.strip()) if url else None
+    if not match:
+        return None
+    host = match.group(1).lower().rstrip('.').removeprefix('www.')
+    labels = host.split('.')
+    # The host itself or any parent domain, e.g. user.github.io -> github.io
+    if any('.'.join(labels[i:]) in SHARED_HOSTS for i in range(len(labels) - 1)):
+        return None
+    return host
+
+def _source_slug(source: str) -> str:
+    return re.sub(r'\W+', '_', (source or 'unknown').casefold())
+
+def record_identifiers(record) -> Tuple[Optional[str], Optional[str], str]:
+    """(source id, homepage domain, source-scoped name) aliases of a StartupData, strongest first"""
+    slug = _source_slug(record.source)
+    source_key = f"{slug}:{record.external_id}" if record.external_id else None
+    domain = homepage_domain(record.homepage)
+    return source_key, f"domain:{domain}" if domain else None, f"name:{slug}:{normalize_name(record.name)}"
+
+def create_entity_tables(conn: sqlite3.Connection):
+    """Create the alias, source record, LSH and merge tables"""
+    for statement in ENTITY_TABLES:
+        conn.execute(statement)
+
+def unkeyed_startups_remaining(conn: sqlite3.Connection, after_id: int) -> int:
+    """Startups past ``after_id`` still waiting for assign_legacy_entity_keys"""
+    return conn.execute("SELECT COUNT(*) FROM startups_data WHERE id > ? AND entity_key IS NULL",
+                        (after_id,)).fetchone()[0]
+
+def assign_legacy_entity_keys(conn: sqlite3.Connection, after_id: int = 0,
+                              limit: int = -1) -> Optional[Tuple[int, int]]:
+    """Key up to ``limit`` startups saved before entity resolution, in id order past ``after_id``
+
+    Each gets a name alias scoped to its source, so the first record from
+    that source with the same name claims it. Returns the last id keyed and
+    the number of rows, or None when none are left.
+    """
+    rows = conn.execute('''
+    SELECT s.id, s.name, source.name FROM startups_data s
+    LEFT JOIN sources source ON source.id = s.source_id
+    WHERE s.id > ? AND s.entity_key IS NULL
+    ORDER BY s.id
+    LIMIT ?
+    ''', (after_id, limit)).fetchall()
+    if not rows:
+        return None
+    conn.executemany("UPDATE startups_data SET entity_key = ? WHERE id = ?",
+                     [(f"legacy:{startup_id}", startup_id) for startup_id, _, _ in rows])
+    conn.executemany("INSERT OR IGNORE INTO entity_aliases (alias, entity_key) VALUES (?, ?)",
+                     [(f"name:{_source_slug(source)}:{normalize_name(name)}", f"legacy:{startup_id}")
+                      for startup_id, name, source in rows])
+    return rows[-1][0], len(rows)
+
+def _chunks(values: Sequence, size: int = SQL_VARIABLE_CHUNK) -> Iterable[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _known_aliases(conn: sqlite3.Connection, aliases: Set[str]) -> Dict[str, str]:
+    known = {}
+    for chunk in _chunks(sorted(aliases)):
+        known.update(conn.execute(
+            f"SELECT alias, entity_key FROM entity_aliases WHERE alias IN ({', '.join('?' * len(chunk))})", chunk
+        ))
+    return known
+
+def _entity_sources(conn: sqlite3.Connection, keys: Set[str]) -> Dict[str, Set[str]]:
+    """Slugs of the sources that have a source id aliased to each of these entities"""
+    sources: Dict[str, Set[str]] = {}
+    for chunk in _chunks(sorted(keys)):
+        for alias, entity_key in conn.execute(f"""
+            SELECT alias, entity_key FROM entity_aliases
+            WHERE entity_key IN ({', '.join('?' * len(chunk))})
+              AND alias NOT LIKE 'domain:%' AND alias NOT LIKE 'name:%'""", chunk):
+            sources.setdefault(entity_key, set()).add(alias.split(':', 1)[0])
+    return sources
+
+def resolve_entities(conn: sqlite3.Connection, records: Sequence) -> List[str]:
+    """Entity key of each StartupData, registering aliases for new identifiers
+
+    A record joins the entity of its source id, else of its homepage domain
+    unless that entity already has a different id from the record's source
+    (two repositories linking the same site stay apart; a Crunchbase company
+    and its GitHub repository meet). Its source-scoped name only matches
+    entities keyed by name (saved before entity resolution, or from a
+    source without ids); a record with a source id consumes that name
+    alias, so a second, unrelated project with the same name becomes its
+    own entity. New entities are keyed by their strongest identifier.
+    """
+    identifiers = [record_identifiers(record) for record in records]
+    known = _known_aliases(conn, {alias for aliases in identifiers for alias in aliases if alias})
+    entity_sources = _entity_sources(conn, {known[domain_key] for _, domain_key, _ in identifiers
+                                            if domain_key in known})
+    added: Dict[str, str] = {}
+    consumed = []
+
+    keys = []
+    for record, (source_key, domain_key, name_key) in zip(records, identifiers):
+        slug = _source_slug(record.source)
+        if source_key in known:
+            matched = source_key
+        elif domain_key in known and not (source_key and slug in entity_sources.get(known[domain_key], ())):
+            matched = domain_key
+        else:
+            matched = name_key if name_key in known else None
+        entity_key = known[matched] if matched else source_key or domain_key or name_key
+        if source_key:
+            entity_sources.setdefault(entity_key, set()).add(slug)
+        if matched == name_key and source_key:
+            del known[name_key]
+            consumed.append(name_key)
+        # Names only become aliases of records that have nothing stronger
+        aliases = (source_key, domain_key) if source_key or domain_key else (name_key,)
+        for alias in aliases:
+            if alias and alias not in known:
+                known[alias] = added[alias] = entity_key
+        keys.append(entity_key)
+
+    conn.executemany("DELETE FROM entity_aliases WHERE alias = ?", [(alias,) for alias in consumed])
+    conn.executemany("INSERT OR IGNORE INTO entity_aliases (alias, entity_key) VALUES (?, ?)", added.items())
+    return keys
+
+class MinHasher:
+    """MinHash signatures and LSH band buckets over name trigrams and description words"""
+
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, bands: int = LSH_BANDS, seed: int = 1):
+        if permutations % bands:
+            raise ValueError("permutations must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self.permutations = permutations
+        self.bands = bands
+        self.a = rng.integers(1, MERSENNE_PRIME, permutations, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, permutations, dtype=np.uint64)
+        # Odd multipliers folding each band's rows into one bucket number
+        self.band_weights = rng.integers(1, 1 << 62, permutations // bands, dtype=np.uint64) | np.uint64(1)
+
+    @staticmethod
+    def shingles(name: str, description: Optional[str]) -> Set[str]:
+        """Character trigrams of the normalized name plus the description's words"""
+        padded = f" {normalize_name(name)} "
+        tokens = {padded[i:i + 3] for i in range(len(padded) - 2)}
+        tokens.update(f"w:{word}" for word in re.findall(r'[^\W_]{3,}', (description or '').casefold()))
+        return tokens
+
+    def signatures(self, texts: Sequence[Tuple[str, Optional[str]]]) -> np.ndarray:
+        """One row of uint32 minimums per (name, description), computed for the whole batch at once"""
+        token_sets = [self.shingles(name, description) or {''} for name, description in texts]
+        hashes = np.fromiter((zlib.crc32(token.encode()) for tokens in token_sets for token in tokens),
+                             dtype=np.uint64)
+        starts = np.cumsum([0] + [len(tokens) for tokens in token_sets[:-1]])
+        # Universal hashing (a*x + b) mod p; uint64 wraparound is part of the scheme, as in most MinHash libraries
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(hashes, self.a) + self.b) % np.uint64(MERSENNE_PRIME)
+        return np.minimum.reduceat(permuted & np.uint64(0xFFFFFFFF), starts, axis=0).astype(np.uint32)
+
+    def buckets(self, signatures: np.ndarray) -> np.ndarray:
+        """Bucket number per signature row and band; 63-bit so they fit an SQLite INTEGER"""
+        bands = signatures.astype(np.uint64).reshape(len(signatures), self.bands, -1)
+        with np.errstate(over='ignore'):
+            mixed = (bands * self.band_weights).sum(axis=2)
+        return (mixed >> np.uint64(1)).astype(np.int64)
+
+    @staticmethod
+    def similarity(first: bytes, second: bytes) -> float:
+        """Estimated Jaccard similarity of two stored signatures"""
+        return float(np.mean(np.frombuffer(first, dtype=np.uint32) == np.frombuffer(second, dtype=np.uint32)))
+
+def _source_records(conn: sqlite3.Connection, refs: Sequence[Tuple[str, str]]) -> Dict[Tuple[str, str], tuple]:
+    """(id, name, description, signature) of the stored source records with these (source, source_ref)"""
+    found = {}
+    for chunk in _chunks(refs):
+        # Joined rather than (source, source_ref) IN (VALUES ...), which SQLite answers with a full scan
+        for record_id, source, source_ref, name, description, signature in conn.execute(
+            f'''SELECT r.id, r.source, r.source_ref, r.name, r.description, r.signature
+            FROM (VALUES {', '.join(['(?, ?)'] * len(chunk))}) ref
+            JOIN startup_sources r ON r.source = ref.column1 AND r.source_ref = ref.column2''',
+            [value for ref in chunk for value in ref]
+        ):
+            found[(source, source_ref)] = (record_id, name, description, signature)
+    return found
+
+def record_sources(conn: sqlite3.Connection, records: Sequence, keys: Sequence[str], hasher: MinHasher) -> int:
+    """Store each StartupData as a source record of its entity
+
+    New records, and those whose name or description changed, are left
+    unsigned (their old LSH buckets removed) for index_unsigned_sources, so
+    saving startups never computes MinHash signatures. Returns the number
+    of records left to index.
+    """
+    refs = [(record.source, record.external_id or normalize_name(record.name)) for record in records]
+    previous = _source_records(conn, refs)
+
+    conn.executemany('''
+    INSERT INTO startup_sources (source, source_ref, entity_key, name, homepage, description)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(source, source_ref) DO UPDATE SET
+        entity_key = excluded.entity_key, name = excluded.name, homepage = excluded.homepage,
+        description = excluded.description, seen_at = CURRENT_TIMESTAMP,
+        signature = CASE WHEN (name, description) IS (excluded.name, excluded.description) THEN signature END
+    ''', [ref + (key, record.name, record.homepage, record.description)
+          for ref, key, record in zip(refs, keys, records)])
+
+    changed = [ref for ref, record in zip(refs, records)
+               if previous.get(ref, (None,) * 3)[1:3] != (record.name, record.description)]
+    # Old buckets are recomputed from the old signature, so entity_lsh needs no index by record
+    stale = [previous[ref] for ref in changed if ref in previous and previous[ref][3] is not None]
+    if stale:
+        _remove_buckets(conn, [(record_id, signature) for record_id, _, _, signature in stale], hasher)
+    return len(changed)
+
+def _remove_buckets(conn: sqlite3.Connection, signed: Sequence[Tuple[int, bytes]], hasher: MinHasher):
+    old_buckets = hasher.buckets(np.frombuffer(b''.join(signature for _, signature in signed), dtype=np.uint32)
+                                 .reshape(len(signed), -1))
+    conn.executemany("DELETE FROM entity_lsh WHERE band = ? AND bucket = ? AND record_id = ?",
+                     [(band, int(bucket), record_id) for (record_id, _), record_buckets in zip(signed, old_buckets)
+                      for band, bucket in enumerate(record_buckets)])
+
+def index_unsigned_sources(conn: sqlite3.Connection, hasher: MinHasher,
+                           limit: int = DEFAULT_INDEX_CHUNK) -> int:
+    """Sign up to ``limit`` unsigned source records and add them to the LSH index
+
+    Meant to run in its own transaction, chunk after chunk, apart from the
+    saves that leave records unsigned. Returns the number of records indexed.
+    """
+    rows = conn.execute(UNSIGNED_SOURCES_QUERY, (limit,)).fetchall()
+    if not rows:
+        return 0
+    ids = [record_id for record_id, _, _ in rows]
+    signatures = hasher.signatures([(name, description) for _, name, description in rows])
+    conn.executemany("UPDATE startup_sources SET signature = ? WHERE id = ?",
+                     [(signature.tobytes(), record_id) for signature, record_id in zip(signatures, ids)])
+    # Inserting in index order keeps the bucket index's page writes local
+    conn.executemany("INSERT OR IGNORE INTO entity_lsh (band, bucket, record_id) VALUES (?, ?, ?)", sorted(
+        (band, int(bucket), record_id)
+        for record_id, record_buckets in zip(ids, hasher.buckets(signatures)) for band, bucket in enumerate(record_buckets)
+    ))
+    return len(rows)
+
+def find_merge_candidates(conn: sqlite3.Connection, threshold: float = 0.6,
+                          max_bucket_size: int = MAX_BUCKET_SIZE) -> List[MergeCandidate]:
+    """Pairs of distinct entities with records sharing an LSH bucket and similar enough signatures
+
+    Only records that collide in some band are compared, so the work grows
+    with the number of collisions rather than with every pair of records.
+    Each entity pair is reported once, most similar first; the entity
+    created first is the one to keep. Records not yet signed by
+    index_unsigned_sources are not compared.
+    """
+    pairs = set()
+    for (members,) in conn.execute(LSH_BUCKETS_QUERY, (max_bucket_size,)):
+        ids = sorted(int(member) for member in members.split(','))
+        pairs.update((first, second) for i, first in enumerate(ids) for second in ids[i + 1:])
+    if not pairs:
+        return []
+
+    records = {}
+    for chunk in _chunks(sorted({record_id for pair in pairs for record_id in pair})):
+        for record_id, entity_key, name, signature, startup_id in conn.execute(f'''
+            SELECT r.id, r.entity_key, r.name, r.signature, s.id FROM startup_sources r
+            LEFT JOIN startups_data s ON s.entity_key = r.entity_key
+            WHERE r.id IN ({', '.join('?' * len(chunk))})''', chunk):
+            records[record_id] = (entity_key, name, signature, startup_id)
+
+    best: Dict[Tuple[str, str], MergeCandidate] = {}
+    for first, second in pairs:
+        first_key, first_name, first_signature, first_startup = records[first]
+        second_key, second_name, second_signature, second_startup = records[second]
+        if first_key == second_key or first_startup is None or second_startup is None:
+            continue
+        score = MinHasher.similarity(first_signature, second_signature)
+        if score < threshold:
+            continue
+        if second_startup < first_startup:
+            first_key, first_name, second_key, second_name = second_key, second_name, first_key, first_name
+        candidate = MergeCandidate(first_key, second_key, first_name, second_name, score)
+        if candidate.score > getattr(best.get((first_key, second_key)), 'score', -1.0):
+            best[(first_key, second_key)] = candidate
+    return sorted(best.values(), key=lambda candidate: (-candidate.score, candidate.entity_key))
+
+def merge_entities(conn: sqlite3.Connection, keep_key: str, merged_key: str, reason: str = 'manual',
+                   score: Optional[float] = None) -> int:
+    """Fold one entity into another, recording the merge; returns the entity_merges id
+
+    Nothing is discarded: the merged startup is kept as JSON in
+    entity_merges, its source records and aliases move to the kept entity,
+    its revenue data points are re-pointed, and values the kept startup
+    lacks are filled from it before its row is deleted.
+    """
+    ids = dict(conn.execute("SELECT entity_key, id FROM startups_data WHERE entity_key IN (?, ?)",
+                            (keep_key, merged_key)))
+    if keep_key == merged_key or keep_key not in ids or merged_key not in ids:
+        raise ValueError(f"Cannot merge {merged_key!r} into {keep_key!r}: both must be distinct stored entities")
+    keep_id, merged_id = ids[keep_key], ids[merged_key]
+
+    cursor = conn.execute("SELECT * FROM startups WHERE id = ?", (merged_id,))
+    merged_row = dict(zip([description[0] for description in cursor.description], cursor.fetchone()))
+
+    conn.execute(f'''
+    UPDATE startups_data SET
+        {', '.join(f"{column} = COALESCE({column}, (SELECT {column} FROM startups_data WHERE id = :merged))"
+                   for column in MERGE_FILL_COLUMNS)}
+    WHERE id = :keep
+    ''', {'keep': keep_id, 'merged': merged_id})
+    conn.execute("UPDATE entity_aliases SET entity_key = ? WHERE entity_key = ?", (keep_key, merged_key))
+    conn.execute("INSERT OR REPLACE INTO entity_aliases (alias, entity_key) VALUES (?, ?)", (merged_key, keep_key))
+    conn.execute("UPDATE startup_sources SET entity_key = ? WHERE entity_key = ?", (keep_key, merged_key))
+    conn.execute("UPDATE revenue_tracking SET startup_id = ? WHERE startup_id = ?", (keep_id, merged_id))
+    conn.execute("DELETE FROM startups_data WHERE id = ?", (merged_id,))
+    merge_id = conn.execute('''
+    INSERT INTO entity_merges (kept_key, merged_key, score, reason, merged_row) VALUES (?, ?, ?, ?, ?)
+    ''', (keep_key, merged_key, score, reason, json.dumps(merged_row, default=str))).lastrowid
+    logger.info(f"Merged {merged_key} into {keep_key} ({reason})")
+    return merge_id
+
+def main():
+    parser = argparse.ArgumentParser(description="List or merge near-duplicate startups")
+    parser.add_argument('db_path', nargs='?', default="startup_data.db")
+    parser.add_argument('--threshold', type=float, default=0.6, help="Minimum estimated similarity to report")
+    parser.add_argument('--merge', nargs=2, metavar=('KEEP', 'MERGED'), help="Fold entity MERGED into KEEP")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    conn = sqlite3.connect(args.db_path)
+    if args.merge:
+        with conn:
+            merge_entities(conn, *args.merge)
+        conn.close()
+        return
+
+    hasher = MinHasher()
+    while True:
+        with conn:
+            if not index_unsigned_sources(conn, hasher):
+                break
+    candidates = find_merge_candidates(conn, args.threshold)
+    conn.close()
+    for candidate in candidates:
+        print(f"{candidate.score:.2f}  {candidate.entity_key} ({candidate.name})  <-  "
+              f"{candidate.duplicate_key} ({candidate.duplicate_name})")
+    print(f"{len(candidates)} merge candidates in {args.db_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the GitHub and Crunchbase APIs
+Serves deterministic search results with pagination, rate-limit headers, injected latency and
+failures, or records/replays real API responses as cassettes, for offline ingestion benchmarks
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+GITHUB_UPSTREAM = "https://api.github.com"
+CRUNCHBASE_UPSTREAM = "https://api.crunchbase.com/api/v4"
+
+# Mirrors GitHub: only the first 1,000 results of a search are reachable
+SEARCH_RESULT_CAP = 1000
+# Synthetic repos are last pushed up to this many days after creation (never in the future)
+PUSH_WINDOW_DAYS = 60
+
+# Request headers that must never be written to a cassette
+SECRET_HEADERS = {'authorization', 'x-cb-user-key', 'cookie'}
+# Not forwarded while recording, so every cassette holds a full response; replay answers them from it
+CONDITIONAL_HEADERS = {'if-none-match', 'if-modified-since'}
+# Response headers worth keeping in a cassette, compared lowercased (upstreams differ in case)
+CASSETTE_HEADERS = {'content-type', 'etag', 'last-modified', 'retry-after'}
+
+DESCRIPTION_WORDS = [
+    'saas', 'startup', 'business', 'platform', 'open source', 'ai', 'machine learning', 'payments',
+    'healthcare', 'education', 'developer', 'api', 'marketplace', 'analytics', 'security', 'climate',
+    'toolkit', 'library', 'framework', 'dashboard', 'automation', 'cli', 'self-hosted', 'fast'
+]
+
+@dataclass
+class FakeAPIConfig:
+    """Behaviour of the stand-in server"""
+    mode: str = 'fake'  # fake, record or replay
+    cassette_dir: str = 'cassettes'
+    seed: int = 42
+    repos_per_day: int = 5
+    start_date: str = '2023-01-01'
+    organizations: int = 500
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0  # fraction of requests answered with a 5xx
+    throttle_rate: float = 0.0  # fraction of requests answered with a 429
+    rate_limit: int = 5000  # requests per window before 403s
+    window_seconds: int = 3600
+    github_upstream: str = GITHUB_UPSTREAM
+    crunchbase_upstream: str = CRUNCHBASE_UPSTREAM
+
+class FakeAPIServer:
+    """aiohttp application mimicking ``search/repositories`` and ``searches/organizations``"""
+
+    def __init__(self, config: FakeAPIConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.window_start = time.time()
+        self.window_used = 0
+        self.stats = {'requests': 0, 'not_modified': 0, 'throttled': 0, 'errors': 0}
+        self.upstream: Optional[aiohttp.ClientSession] = None
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get('/search/repositories', self.search_repositories)
+        app.router.add_post('/searches/organizations', self.search_organizations)
+        app.router.add_get('/_stats', self.get_stats)
+        app.on_cleanup.append(self._close_upstream)
+        return app
+
+    # -- Request pipeline -------------------------------------------------------------
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        if request.path == '/_stats':
+            return await handler(request)
+
+        self.stats['requests'] += 1
+        delay = self.config.latency_ms + self.random.uniform(0, self.config.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if self.config.mode in ('record', 'replay'):
+            return await self._cassette(request)
+
+        roll = self.random.random()
+        if roll < self.config.error_rate:
+            self.stats['errors'] += 1
+            return web.json_response({'message': 'Injected server error'},
+                                     status=self.random.choice([500, 502, 503]))
+        if roll < self.config.error_rate + self.config.throttle_rate:
+            self.stats['throttled'] += 1
+            return web.json_response({'message': 'Injected throttle'}, status=429,
+                                     headers={**self._rate_headers(), 'Retry-After': '1'})
+
+        response = await handler(request)
+
+        # Conditional requests are free, as on GitHub
+        if response.status == 200 and request.headers.get('If-None-Match') == response.headers.get('ETag'):
+            self.stats['not_modified'] += 1
+            return web.Response(status=304, headers={'ETag': response.headers['ETag'], **self._rate_headers()})
+
+        if not self._charge():
+            self.stats['throttled'] += 1
+            return web.json_response({'message': 'API rate limit exceeded'}, status=403,
+                                     headers=self._rate_headers())
+        response.headers.update(self._rate_headers())
+        return response
+
+    def _charge(self) -> bool:
+        now = time.time()
+        if now - self.window_start >= self.config.window_seconds:
+            self.window_start, self.window_used = now, 0
+        if self.window_used >= self.config.rate_limit:
+            return False
+        self.window_used += 1
+        return True
+
+    def _rate_headers(self) -> Dict[str, str]:
+        return {
+            'X-RateLimit-Limit': str(self.config.rate_limit),
+            'X-RateLimit-Remaining': str(max(0, self.config.rate_limit - self.window_used)),
+            'X-RateLimit-Reset': str(int(self.window_start + self.config.window_seconds))
+        }
+
+    @staticmethod
+    def _json_with_etag(payload: Dict) -> web.Response:
+        body = json.dumps(payload)
+        etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+        return web.Response(text=body, content_type='application/json', headers={'ETag': etag})
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    # -- GitHub -----------------------------------------------------------------------
+
+    async def search_repositories(self, request: web.Request) -> web.Response:
+        per_page = min(int(request.query.get('per_page', 30)), 100)
+        page = int(request.query.get('page', 1))
+        if (page - 1) * per_page >= SEARCH_RESULT_CAP:
+            return web.json_response({'message': 'Only the first 1000 search results are available'},
+                                     status=422)
+
+        query = request.query.get('q', '')
+        start, end = self._created_range(query)
+        first = (page - 1) * per_page
+        pushed = re.search(r'pushed:>(\S+)', query)
+
+        if pushed:
+            # Incremental queries: only repos pushed after the cutoff, which is at most 60 days after creation
+            cutoff = pushed.group(1)
+            start = max(start, date.fromisoformat(cutoff[:10]) - timedelta(days=PUSH_WINDOW_DAYS))
+            matching = [repo for i in range(max(0, (end - start).days + 1) * self.config.repos_per_day)
+                        for repo in [self._repository(start + timedelta(days=i // self.config.repos_per_day),
+                                                      i % self.config.repos_per_day)]
+                        if repo['pushed_at'] > cutoff]
+            total_count = len(matching)
+            items = matching[first:min(first + per_page, SEARCH_RESULT_CAP)]
+        else:
+            days = max(0, (end - start).days + 1)
+            total_count = days * self.config.repos_per_day
+            last = min(first + per_page, total_count, SEARCH_RESULT_CAP)
+            items = [self._repository(start + timedelta(days=i // self.config.repos_per_day),
+                                      i % self.config.repos_per_day)
+                     for i in range(first, last)]
+        return self._json_with_etag({'total_count': total_count, 'incomplete_results': False, 'items': items})
+
+    def _created_range(self, query: str) -> Tuple[date, date]:
+        """Resolve the ``created:`` qualifier against the synthetic dataset's date span"""
+        start, end = date.fromisoformat(self.config.start_date), date.today()
+        match = re.search(r'created:(\S+)', query)
+        if match:
+            value = match.group(1)
+            if '..' in value:
+                low, high = value.split('..')
+                start, end = max(start, date.fromisoformat(low[:10])), min(end, date.fromisoformat(high[:10]))
+            elif value.startswith('>='):
+                start = max(start, date.fromisoformat(value[2:12]))
+            elif value.startswith('>'):
+                start = max(start, date.fromisoformat(value[1:11]) + timedelta(days=1))
+        return start, end
+
+    def _repository(self, created: date, index: int) -> Dict:
+        rng = random.Random(f"{self.config.seed}-{created.toordinal()}-{index}")
+        repo_id = created.toordinal() * 1000 + index
+        name = f"repo-{created.strftime('%Y%m%d')}-{index}"
+        return {
+            'id': repo_id,
+            'name': name,
+            'full_name': f"owner{rng.randint(1, 500)}/{name}",
+            'description': ' '.join(rng.sample(DESCRIPTION_WORDS, 4)),
+            'stargazers_count': rng.randint(100, 5000),
+            'forks_count': rng.randint(0, 400),
+            'has_wiki': rng.random() < 0.6,
+            'homepage': f"https://{name}.example.com" if rng.random() < 0.5 else None,
+            'topics': rng.sample(['saas', 'ai', 'fintech', 'devops', 'healthcare', 'edtech'], 2),
+            'created_at': f"{created.isoformat()}T12:00:00Z",
+            'pushed_at': f"{min(date.today(), created + timedelta(days=rng.randint(0, PUSH_WINDOW_DAYS))).isoformat()}T12:00:00Z"
+        }
+
+    # -- Crunchbase -------------------------------------------------------------------
+
+    async def search_organizations(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        limit = min(int(body.get('limit', 50)), 1000)
+        after = body.get('after_id')
+        first = int(after.rsplit('-', 1)[1]) + 1 if after else 0
+        entities = [self._organization(i) for i in range(first, min(first + limit, self.config.organizations))]
+        for predicate in body.get('query', []):
+            if predicate.get('field_id') == 'updated_at' and predicate.get('operator_id') == 'gt':
+                # Synthetic organizations never change after their first update
+                entities = [e for e in entities if e['properties']['updated_at'] > predicate['values'][0]]
+        return self._json_with_etag({'count': self.config.organizations, 'entities': entities})
+
+    def _organization(self, index: int) -> Dict:
+        rng = random.Random(f"{self.config.seed}-org-{index}")
+        name = f"Org {index}"
+        return {
+            'uuid': f"org-{index}",
+            'properties': {
+                'identifier': {'value': name, 'permalink': f"org-{index}"},
+                'short_description': ' '.join(rng.sample(DESCRIPTION_WORDS, 5)),
+                'categories': [{'value': rng.choice(['SaaS', 'FinTech', 'HealthTech', 'DevTools'])}],
+                'funding_total': {'value_usd': rng.randint(1, 200) * 100000},
+                'num_employees_enum': rng.choice(['c_00001_00010', 'c_00011_00050', 'c_00051_00100']),
+                'website': {'value': f"https://org-{index}.example.com"},
+                'last_funding_type': rng.choice(['pre_seed', 'seed', 'series_a', 'series_b']),
+                'last_funding_at': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                'updated_at': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00Z"
+            }
+        }
+
+    # -- Record / replay --------------------------------------------------------------
+
+    async def _cassette(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        key = hashlib.sha256(json.dumps(
+            [request.method, request.path, sorted(request.query.items()), body.decode(errors='replace')]
+        ).encode()).hexdigest()
+        path = os.path.join(self.config.cassette_dir, f"{key}.json")
+
+        if self.config.mode == 'replay':
+            if not os.path.exists(path):
+                return web.json_response({'message': f"No cassette for {request.method} {request.path_qs}"},
+                                         status=404)
+            with open(path) as f:
+                cassette = json.load(f)
+            response = web.Response(status=cassette['status'], body=cassette['body'].encode(),
+                                    headers=cassette['headers'])
+            if response.status == 200 and self._not_modified(request, response):
+                self.stats['not_modified'] += 1
+                return web.Response(status=304, headers={
+                    name: value for name, value in response.headers.items()
+                    if name.lower() in ('etag', 'last-modified') or name.lower().startswith('x-ratelimit')
+                })
+            return response
+
+        upstream = (self.config.github_upstream if request.path.startswith('/search/')
+                    else self.config.crunchbase_upstream)
+        headers = {name: value for name, value in request.headers.items()
+                   if name.lower() not in ('host', 'content-length', *CONDITIONAL_HEADERS)}
+        if self.upstream is None:
+            self.upstream = aiohttp.ClientSession()
+        try:
+            async with self.upstream.request(request.method, f"{upstream}{request.path}", params=request.query,
+                                             data=body or None, headers=headers) as response:
+                response_body = await response.read()
+                kept_headers = {name: value for name, value in response.headers.items()
+                                if name.lower() in CASSETTE_HEADERS or name.lower().startswith('x-ratelimit')}
+        except aiohttp.ClientError as e:
+            return web.json_response({'message': f"Upstream request failed: {e}"}, status=502)
+
+        os.makedirs(self.config.cassette_dir, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                'request': {'method': request.method, 'path': request.path_qs,
+                            'headers': {name: value for name, value in headers.items()
+                                        if name.lower() not in SECRET_HEADERS}},
+                'status': response.status,
+                'headers': kept_headers,
+                'body': response_body.decode()
+            }, f, indent=2)
+        return web.Response(status=response.status, body=response_body, headers=kept_headers)
+
+    @staticmethod
+    def _not_modified(request: web.Request, response: web.Response) -> bool:
+        """Whether a conditional request matches the recorded response; If-None-Match wins over If-Modified-Since"""
+        if 'If-None-Match' in request.headers:
+            etag = response.headers.get('ETag')
+            return etag is not None and etag in (tag.strip() for tag in request.headers['If-None-Match'].split(','))
+        if request.if_modified_since is not None and response.last_modified is not None:
+            return response.last_modified <= request.if_modified_since
+        return False
+
+    async def _close_upstream(self, app: web.Application):
+        if self.upstream is not None:
+            await self.upstream.close()
+
+async def start_server(config: FakeAPIConfig, host: str = '127.0.0.1', port: int = 0
+                       ) -> Tuple[web.AppRunner, str, FakeAPIServer]:
+    """Start the server in the running event loop; returns the runner, its base URL and the server"""
+    server = FakeAPIServer(config)
+    runner = web.AppRunner(server.create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound_port}", server
+
+def main():
+    """Run the stand-in server from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--mode', choices=['fake', 'record', 'replay'], default='fake')
+    parser.add_argument('--cassette-dir', default='cassettes')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repos-per-day', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=5000)
+    parser.add_argument('--window-seconds', type=int, default=3600)
+    args = parser.parse_args()
+
+    config = FakeAPIConfig(
+        mode=args.mode, cassette_dir=args.cassette_dir, seed=args.seed, repos_per_day=args.repos_per_day,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, rate_limit=args.rate_limit, window_seconds=args.window_seconds
+    )
+    print(f"Fake API server ({args.mode}) on http://{args.host}:{args.port}")
+    print(f"  GITHUB_API_URL=http://{args.host}:{args.port}")
+    print(f"  CRUNCHBASE_API_URL=http://{args.host}:{args.port}")
+    web.run_app(FakeAPIServer(config).create_app(), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
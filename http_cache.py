@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Conditional-request HTTP cache for startup data sources
+Stores response bodies with their ETag/Last-Modified on disk and revalidates them on the next request
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "http_cache.db"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class ResponseCache:
+    """Size-bounded, least-recently-used store of validated response bodies"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            url TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            body BLOB,
+            size INTEGER,
+            stored_at REAL,
+            accessed_at REAL
+        )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(method: str, url: str, params: Optional[Dict] = None, body: Any = None) -> str:
+        """Identify a request by method, URL, query parameters and JSON body"""
+        payload = json.dumps([method.upper(), url, sorted((params or {}).items()), body],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Tuple[Optional[str], Optional[str], bytes]]:
+        """Return ``(etag, last_modified, body)`` for a cached response, marking it recently used"""
+        row = self.conn.execute(
+            "SELECT etag, last_modified, body FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        return row
+
+    def store(self, key: str, url: str, etag: Optional[str], last_modified: Optional[str], body: bytes):
+        """Save a response body and evict the least recently used entries over the size limit"""
+        if len(body) > self.max_bytes:
+            return
+
+        now = time.time()
+        previous = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self.conn.execute('''
+        INSERT OR REPLACE INTO responses (key, url, etag, last_modified, body, size, stored_at, accessed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (key, url, etag, last_modified, body, len(body), now, now))
+        self.total_bytes += len(body) - (previous[0] if previous else 0)
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            oldest = self.conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not oldest:
+                self.total_bytes = 0
+                return
+            for key, size in oldest:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def close(self):
+        self.conn.close()
+
+class CachedSession:
+    """aiohttp session wrapper that rate limits requests and revalidates cached responses"""
+
+    def __init__(self, cache: ResponseCache, rate_limiter: RateLimiter,
+                 session: Optional[aiohttp.ClientSession] = None):
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self) -> 'CachedSession':
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._owns_session:
+            await self.session.close()
+
+    async def request_json(self, source: str, method: str, url: str, params: Optional[Dict] = None,
+                           json_body: Any = None, headers: Optional[Dict] = None) -> Tuple[int, Any]:
+        """Make a rate-limited request, returning ``(status, parsed JSON or None)``
+
+        A cached body is sent back with ``If-None-Match``/``If-Modified-Since``;
+        on a 304 the stored body is returned with status 200.
+        """
+        key = self.cache.make_key(method, url, params, json_body)
+        cached = self.cache.lookup(key)
+        request_headers = dict(headers or {})
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                request_headers['If-None-Match'] = etag
+            if last_modified:
+                request_headers['If-Modified-Since'] = last_modified
+
+        await self.rate_limiter.acquire(source)
+        async with self.session.request(method, url, params=params, json=json_body,
+                                        headers=request_headers) as response:
+            self.rate_limiter.update_from_headers(source, response.status, response.headers)
+
+            if response.status == 304 and cached:
+                self.cache.hits += 1
+                if 'X-RateLimit-Remaining' not in response.headers:
+                    # Revalidations are not charged against the API budget
+                    self.rate_limiter.refund(source)
+                return 200, json.loads(cached[2])
+
+            if response.status != 200:
+                return response.status, None
+
+            self.cache.misses += 1
+            body = await response.read()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.cache.store(key, url, etag, last_modified, body)
+            return 200, json.loads(body)
+
+    async def get_json(self, source: str, url: str, params: Optional[Dict] = None,
+                       headers: Optional[Dict] = None) -> Tuple[int, Any]:
+        return await self.request_json(source, 'GET', url, params=params, headers=headers)
+
+_caches: Dict[str, ResponseCache] = {}
+
+def get_response_cache(path: str = DEFAULT_CACHE_PATH) -> ResponseCache:
+    """Return the process-wide cache for a cache file"""
+    key = os.path.abspath(path)
+    if key not in _caches:
+        _caches[key] = ResponseCache(path)
+    return _caches[key]
@@ -7,14 +7,17 @@ Phase 1: Data source expansion and development planning
 import streamlit as st
 import requests
 import asyncio
-import aiohttp
 from datetime import datetime
 import json
+import os
 from dataclasses import dataclass
 from typing import List, Dict, Optional
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from http_cache import CachedSession, ResponseCache, get_response_cache
+from rate_limiter import RateLimiter, get_rate_limiter
+
 @dataclass
 class StartupData:
     """Enhanced startup data structure"""
@@ -30,6 +33,8 @@ class StartupData:
     source_platform: str
     website_url: Optional[str]
     prospect_score: int = 0
+    updated_at: Optional[str] = None
+    external_id: Optional[str] = None
 
 @dataclass
 class DevelopmentPlan:
@@ -46,29 +51,86 @@ class DevelopmentPlan:
 class CrunchbaseCollector:
     """Crunchbase API integration for startup data"""
     
-    def __init__(self, api_key: str = None):
+    RATE_LIMIT = 200  # requests per hour
+    
+    def __init__(self, api_key: str = None, rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[ResponseCache] = None, base_url: Optional[str] = None):
         self.api_key = api_key
-        self.base_url = "https://api.crunchbase.com/api/v4"
+        self.base_url = base_url or os.environ.get('CRUNCHBASE_API_URL', "https://api.crunchbase.com/api/v4")
+        
+        # Shares the 'crunchbase' budget with StartupTracker in the same process
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.rate_limiter.configure('crunchbase', self.RATE_LIMIT)
+        self.response_cache = response_cache or get_response_cache()
         
-    async def collect_recent_startups(self, limit: int = 100) -> List[StartupData]:
-        """Collect recent startup data from Crunchbase"""
+    async def collect_recent_startups(self, limit: int = 100, session: Optional[CachedSession] = None,
+                                      updated_since: Optional[str] = None) -> List[StartupData]:
+        """Collect recent startup data from Crunchbase
+        
+        Pass ``session`` to share an open session with other sources, and
+        ``updated_since`` to fetch only organizations updated after a cursor.
+        """
         if not self.api_key:
             # Return mock data for demonstration
             return self._get_mock_startup_data()
             
+        if session is None:
+            async with CachedSession(self.response_cache, self.rate_limiter) as own_session:
+                return await self.collect_recent_startups(limit, own_session, updated_since)
+        
         # Real API implementation
         headers = {"X-cb-user-key": self.api_key}
         url = f"{self.base_url}/searches/organizations"
+        query = {
+            "field_ids": ["identifier", "short_description", "categories", 
+                         "funding_total", "num_employees_enum", "website",
+                         "last_funding_type", "last_funding_at", "updated_at"],
+            "order": [{"field_id": "created_at", "sort": "desc"}],
+            "limit": limit
+        }
+        if updated_since:
+            # Oldest changes first, so the cursor advances steadily when more than `limit` changed
+            query["query"] = [{"type": "predicate", "field_id": "updated_at",
+                               "operator_id": "gt", "values": [updated_since]}]
+            query["order"] = [{"field_id": "updated_at", "sort": "asc"}]
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json={
-                "field_ids": ["identifier", "short_description", "categories", 
-                             "funding_total", "num_employees_enum", "website"],
-                "order": [{"field_id": "created_at", "sort": "desc"}],
-                "limit": limit
-            }) as response:
-                data = await response.json()
-                return self._parse_crunchbase_data(data)
+        status, data = await session.request_json('crunchbase', 'POST', url, headers=headers, json_body=query)
+        if status != 200 or not data:
+            return []
+        return self._parse_crunchbase_data(data)
+    
+    def _parse_crunchbase_data(self, data: Dict) -> List[StartupData]:
+        """Convert a searches/organizations response into StartupData"""
+        startups = []
+        for entity in data.get('entities', []):
+            props = entity.get('properties', {})
+            categories = [category.get('value') for category in props.get('categories') or []]
+            funding_type = props.get('last_funding_type') or ''
+            
+            startups.append(StartupData(
+                name=props.get('identifier', {}).get('value', 'Unknown'),
+                description=props.get('short_description') or '',
+                funding_stage=funding_type.replace('_', ' ').title() if funding_type else 'Unknown',
+                employee_count=self._parse_employee_range(props.get('num_employees_enum')),
+                tech_stack=[],
+                market_sector=categories[0] if categories else 'Unknown',
+                revenue_model='Unknown',
+                last_funding_amount=(props.get('funding_total') or {}).get('value_usd'),
+                last_funding_date=props.get('last_funding_at'),
+                source_platform="Crunchbase",
+                website_url=(props.get('website') or {}).get('value'),
+                updated_at=props.get('updated_at'),
+                external_id=entity.get('uuid')
+            ))
+        return startups
+    
+    @staticmethod
+    def _parse_employee_range(value: Optional[str]) -> Optional[int]:
+        """Turn an enum like 'c_00011_00050' into its lower bound"""
+        try:
+            return int(value.split('_')[1])
+        except (AttributeError, IndexError, ValueError):
+            return None
     
     def _get_mock_startup_data(self) -> List[StartupData]:
         """Mock data for development/demo purposes"""
@@ -611,9 +673,14 @@ def create_prospect_analysis_page():
     # Sort by score
     scored_prospects.sort(key=lambda x: x['score_data']['score'], reverse=True)
     
+    show_top_prospects(scored_prospects[:10])
+
+@st.fragment
+def show_top_prospects(scored_prospects: List[Dict]):
+    """Prospect cards; their pitch buttons rerun only this list, not the prospect load"""
     st.subheader("📈 Top Prospects")
     
-    for prospect in scored_prospects[:10]:
+    for prospect in scored_prospects:
         startup = prospect['startup']
         score_data = prospect['score_data']
         
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the startup database
+The schema version lives in PRAGMA user_version; data backfills run in resumable chunks between which
+readers and other writers carry on. Run directly to upgrade or to estimate an upgrade:
+python migrations.py [db_path] [--dry-run] [--target VERSION]
+"""
+
+import argparse
+import logging
+import math
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from change_log import create_change_log
+from database import ConnectionManager
+from entity_resolution import assign_legacy_entity_keys, create_entity_tables, unkeyed_startups_remaining
+from queries import INDEX_SET_VERSION, apply_index_set
+from rollups import create_rollups, replace_rollup_triggers
+from startups_schema import (
+    add_entity_key, copy_legacy_chunk, create_normalized_schema, finish_legacy_copy, legacy_rows_remaining,
+    start_legacy_copy
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_PAUSE = 0.05  # seconds between backfill chunks
+DEFAULT_SAMPLE_SIZE = 1000  # rows a dry run backfills to measure throughput
+
+# One row per migration started; cursor and rows_done let an interrupted backfill resume
+PROGRESS_TABLE = '''
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    cursor INTEGER NOT NULL DEFAULT 0,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT,
+    completed_at TEXT
+)
+'''
+
+@dataclass
+class Backfill:
+    """Data migrated in chunks after a migration's schema step
+
+    ``run_chunk(conn, cursor, limit)`` processes up to ``limit`` rows past
+    the integer ``cursor`` and returns the new cursor and rows processed,
+    or None when nothing is left; ``remaining(conn, cursor)`` counts what
+    is left. ``finish`` runs in the transaction that completes the migration.
+    """
+    run_chunk: Callable[[sqlite3.Connection, int, int], Optional[Tuple[int, int]]]
+    remaining: Callable[[sqlite3.Connection, int], int]
+    finish: Optional[Callable[[sqlite3.Connection], None]] = None
+
+@dataclass
+class Migration:
+    """One schema version: a schema step, optionally followed by a chunked backfill
+
+    ``apply`` runs in a single transaction and must tolerate a database that
+    already has its objects, since databases from before versioning start
+    at user_version 0. ``estimate`` counts the rows the migration will touch.
+    """
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+    backfill: Optional[Backfill] = None
+    estimate: Optional[Callable[[sqlite3.Connection], int]] = None
+
+@dataclass
+class MigrationEstimate:
+    """Dry-run forecast for one pending migration"""
+    version: int
+    name: str
+    rows: int
+    seconds: float
+    resuming: bool = False
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')",
+                        (name,)).fetchone() is not None
+
+def _count(conn: sqlite3.Connection, table: str) -> int:
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] if _table_exists(conn, table) else 0
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def _create_core_tables(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS revenue_tracking (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        startup_id INTEGER,
+        revenue_period TEXT,
+        revenue_amount REAL,
+        metric_type TEXT,
+        data_date TEXT,
+        confidence_score REAL,
+        FOREIGN KEY (startup_id) REFERENCES startups_data (id)
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS market_analysis (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        industry TEXT,
+        market_size REAL,
+        growth_rate REAL,
+        avg_first_year_revenue REAL,
+        success_rate REAL,
+        analysis_date TEXT
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS source_state (
+        source TEXT NOT NULL,
+        query TEXT NOT NULL,
+        watermark TEXT,
+        updated_at TEXT,
+        PRIMARY KEY (source, query)
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS github_query_shards (
+        base_query TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        end_date TEXT NOT NULL,
+        total_count INTEGER,
+        updated_at TEXT,
+        PRIMARY KEY (base_query, start_date)
+    )
+    ''')
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+def _normalize_startups(conn: sqlite3.Connection):
+    create_normalized_schema(conn)
+    start_legacy_copy(conn)
+
+def _prepare_entity_resolution(conn: sqlite3.Connection):
+    add_entity_key(conn)
+    create_entity_tables(conn)
+
+def _estimate_entity_keys(conn: sqlite3.Connection) -> int:
+    legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'startups' AND type = 'table'").fetchone()
+    if legacy or 'entity_key' not in _columns(conn, 'startups_data'):
+        # Every legacy row arrives in startups_data without a key
+        return _count(conn, 'startups')
+    return unkeyed_startups_remaining(conn, 0)
+
+def _estimate_rollups(conn: sqlite3.Connection) -> int:
+    # Rollups keyed by industry text predate normalization and are rebuilt
+    return 0 if 'industry_id' in _columns(conn, 'industry_stage_rollups') else _count(conn, 'startups')
+
+def _estimate_index_set(conn: sqlite3.Connection) -> int:
+    applied = (conn.execute("SELECT value FROM schema_meta WHERE key = 'index_set_version'").fetchone()
+               if _table_exists(conn, 'schema_meta') else None)
+    if applied and int(applied[0]) == INDEX_SET_VERSION:
+        return 0
+    return _count(conn, 'startups') + _count(conn, 'revenue_tracking')
+
+# In version order; append new migrations, never edit shipped ones
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'core tables', _create_core_tables),
+    Migration(2, 'normalized startups storage', _normalize_startups,
+              backfill=Backfill(copy_legacy_chunk, legacy_rows_remaining, finish=finish_legacy_copy),
+              estimate=lambda conn: legacy_rows_remaining(conn, 0)),
+    Migration(3, 'entity resolution', _prepare_entity_resolution,
+              backfill=Backfill(assign_legacy_entity_keys, unkeyed_startups_remaining),
+              estimate=_estimate_entity_keys),
+    Migration(4, 'industry/stage rollups', create_rollups, estimate=_estimate_rollups),
+    Migration(5, 'change log', create_change_log,
+              estimate=lambda conn: 0 if _table_exists(conn, 'startup_changes') else _count(conn, 'startups')),
+    # Later index set versions ship as new migrations calling apply_index_set again
+    Migration(6, f'index set {INDEX_SET_VERSION}', apply_index_set, estimate=_estimate_index_set),
+    # Adds the index of source records awaiting index_unsigned_sources
+    Migration(7, 'near-duplicate indexing apart from saves', create_entity_tables),
+    # Saves maintain the rollups per batch; the triggers now skip rows they write
+    Migration(8, 'batched rollups', replace_rollup_triggers),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def _progress(conn: sqlite3.Connection, version: int) -> Optional[Tuple[int, int]]:
+    """(cursor, rows_done) of a started migration, or None if it has not started"""
+    return conn.execute("SELECT cursor, rows_done FROM schema_migrations WHERE version = ?", (version,)).fetchone()
+
+def _pending(conn: sqlite3.Connection, target: Optional[int]) -> List[Migration]:
+    current = schema_version(conn)
+    target = LATEST_VERSION if target is None else target
+    return [migration for migration in MIGRATIONS if current < migration.version <= target]
+
+def migrate(db: ConnectionManager, target: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+            pause: float = DEFAULT_PAUSE) -> int:
+    """Apply pending migrations up to ``target`` (default: all), returning the resulting schema version
+
+    Each schema step commits on its own; backfills then commit every
+    ``chunk_size`` rows and sleep ``pause`` seconds in between, so the
+    database stays usable throughout. An interrupted run resumes from the
+    last committed chunk. Every transaction starts with BEGIN IMMEDIATE and
+    re-checks the version, so concurrent callers cannot apply a step twice.
+    """
+    with db.writer() as conn:
+        conn.execute(PROGRESS_TABLE)
+        pending = _pending(conn, target)
+
+    for migration in pending:
+        with db.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if schema_version(conn) >= migration.version:
+                continue
+            if _progress(conn, migration.version) is None:
+                logger.info(f"Applying migration {migration.version}: {migration.name}")
+                migration.apply(conn)
+                conn.execute("INSERT INTO schema_migrations (version, name, started_at) VALUES (?, ?, ?)",
+                             (migration.version, migration.name, datetime.now().isoformat()))
+            else:
+                logger.info(f"Resuming migration {migration.version}: {migration.name}")
+            if migration.backfill is None:
+                _complete(conn, migration)
+                continue
+
+        _run_backfill(db, migration, chunk_size, pause)
+
+        with db.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if schema_version(conn) < migration.version:
+                if migration.backfill.finish:
+                    migration.backfill.finish(conn)
+                _complete(conn, migration)
+
+    with db.writer() as conn:
+        return schema_version(conn)
+
+def _complete(conn: sqlite3.Connection, migration: Migration):
+    conn.execute(f"PRAGMA user_version = {migration.version}")
+    conn.execute("UPDATE schema_migrations SET completed_at = ? WHERE version = ?",
+                 (datetime.now().isoformat(), migration.version))
+    logger.info(f"Schema is at version {migration.version} ({migration.name})")
+
+def _run_backfill(db: ConnectionManager, migration: Migration, chunk_size: int, pause: float):
+    while True:
+        with db.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Read inside the transaction, so concurrent migrators never process the same chunk
+            cursor, rows_done = _progress(conn, migration.version)
+            step = migration.backfill.run_chunk(conn, cursor, chunk_size)
+            if step is None:
+                break
+            cursor, rows = step
+            conn.execute("UPDATE schema_migrations SET cursor = ?, rows_done = ? WHERE version = ?",
+                         (cursor, rows_done + rows, migration.version))
+        logger.info(f"Migration {migration.version}: backfilled {rows_done + rows:,} rows")
+        time.sleep(pause)
+
+def dry_run(db: ConnectionManager, target: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+            pause: float = DEFAULT_PAUSE, sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[MigrationEstimate]:
+    """Estimate rows touched and duration of each pending migration, changing nothing
+
+    Rows are counted on the database as it is. Durations are measured by
+    running the pending migrations in one transaction that is rolled back,
+    with each backfill cut to a ``sample_size`` chunk: backfills extrapolate
+    the sample's throughput, and a schema step's time is scaled by how many
+    rows it would see for real versus in the sampled run.
+    """
+    estimates = []
+    with db.writer() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(PROGRESS_TABLE)
+            pending = _pending(conn, target)
+            full_rows = {}
+            for migration in pending:
+                progress = _progress(conn, migration.version)
+                if progress and migration.backfill:
+                    full_rows[migration.version] = migration.backfill.remaining(conn, progress[0])
+                else:
+                    full_rows[migration.version] = migration.estimate(conn) if migration.estimate else 0
+
+            for migration in pending:
+                progress = _progress(conn, migration.version)
+                rows = full_rows[migration.version]
+                sampled_rows = migration.estimate(conn) if migration.estimate else 0
+                started = time.perf_counter()
+                if progress is None:
+                    migration.apply(conn)
+                seconds = (time.perf_counter() - started) * (rows / sampled_rows if sampled_rows else 1)
+
+                if migration.backfill:
+                    started = time.perf_counter()
+                    step = migration.backfill.run_chunk(conn, progress[0] if progress else 0,
+                                                        min(chunk_size, sample_size))
+                    if step and step[1]:
+                        seconds += (time.perf_counter() - started) / step[1] * rows
+                        seconds += math.ceil(rows / chunk_size) * pause
+                    if migration.backfill.finish:
+                        started = time.perf_counter()
+                        migration.backfill.finish(conn)
+                        seconds += time.perf_counter() - started
+                estimates.append(MigrationEstimate(migration.version, migration.name, rows, seconds,
+                                                   resuming=progress is not None))
+        finally:
+            conn.rollback()
+    return estimates
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade the startup database schema")
+    parser.add_argument('db_path', nargs='?', default="startup_data.db")
+    parser.add_argument('--dry-run', action='store_true', help="Estimate the upgrade without changing anything")
+    parser.add_argument('--target', type=int, help=f"Stop at this version (latest: {LATEST_VERSION})")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--pause', type=float, default=DEFAULT_PAUSE, help="Seconds to sleep between chunks")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    db = ConnectionManager(args.db_path)
+    with db.writer() as conn:
+        current = schema_version(conn)
+
+    if args.dry_run:
+        estimates = dry_run(db, args.target, args.chunk_size, args.pause)
+        for estimate in estimates:
+            print(f"{estimate.version:>3}  {estimate.name:<32} {estimate.rows:>12,} rows  "
+                  f"~{estimate.seconds:,.1f}s{'  (resuming)' if estimate.resuming else ''}")
+        print(f"{args.db_path}: version {current}, {len(estimates)} pending migrations, "
+              f"~{sum(estimate.seconds for estimate in estimates):,.1f}s estimated")
+    else:
+        version = migrate(db, args.target, args.chunk_size, args.pause)
+        print(f"{args.db_path}: version {current} -> {version}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
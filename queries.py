@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+SQL shipped with the tracker and dashboard, and the indexes that serve it
+Run directly to check every query's plan against a database: python queries.py [db_path]
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from entity_resolution import LSH_BUCKETS_QUERY, UNSIGNED_SOURCES_QUERY
+from rollups import RECOMPUTE_QUERY
+from startups_schema import startups_select
+
+logger = logging.getLogger(__name__)
+
+# Bump when INDEXES changes and add a migration calling apply_index_set (see migrations.py);
+# it drops RETIRED_INDEXES and re-analyzes
+INDEX_SET_VERSION = 3
+
+# Startups are stored in startups_data (see startups_schema.py); the startups view joins in lookups
+INDEXES = {
+    # Covers the dashboard's startup query
+    'idx_startups_data_industry_covering':
+        "startups_data (industry_id, revenue_estimate, growth_rate, funding_raised, stage_id, name)",
+    # Serves the rollup triggers' min/max recompute and a full rollup rebuild
+    'idx_startups_data_industry_stage_revenue': "startups_data (industry_id, stage_id, revenue_estimate)",
+    'idx_startups_data_source': "startups_data (source_id)",
+    'idx_startups_data_created_at': "startups_data (created_at)",
+    'idx_revenue_tracking_startup_date': "revenue_tracking (startup_id, data_date)",
+}
+
+# Indexes shipped by earlier versions of INDEXES
+RETIRED_INDEXES: List[str] = [
+    'idx_startups_stage_revenue',  # v1: served the per-stage aggregate now read from rollups
+    # v2: on the legacy startups table, replaced by their startups_data equivalents
+    'idx_startups_industry_covering',
+    'idx_startups_industry_stage_revenue',
+    'idx_startups_source',
+    'idx_startups_created_at',
+]
+
+# Insights aggregate industry_stage_rollups (see rollups.py) in one pass instead of scanning startups
+ROLLUPS_QUERY = '''
+SELECT industry.name as industry, stage.name as stage, startup_count, revenue_count, revenue_sum,
+       revenue_min, revenue_max, growth_count, growth_sum, funding_count, funding_sum
+FROM industry_stage_rollups
+LEFT JOIN industries industry ON industry.id = industry_stage_rollups.industry_id
+LEFT JOIN stages stage ON stage.id = industry_stage_rollups.stage_id
+'''
+
+# The startups view's columns, newest first. Left to itself SQLite sorts the whole table in a temp b-tree
+# rather than walk the created_at index, so the index is named
+EXPORT_QUERY = startups_select(indexed_by='idx_startups_data_created_at') + "ORDER BY s.created_at DESC\n"
+
+# Rows changed after a sync token; deleted startups come back as tombstones with only id and name.
+# An inner join plus UNION ALL (rather than a LEFT JOIN) lets SQLite flatten the startups view
+CHANGES_SINCE_QUERY = '''
+SELECT c.seq as change_seq, c.op as change_op, s.id, s.name, s.industry, s.founded_date,
+       s.revenue_estimate, s.growth_rate, s.funding_raised, s.employee_count, s.revenue_model,
+       s.last_updated, s.source, s.stage, s.location, s.created_at
+FROM startup_changes c
+JOIN startups s ON s.id = c.startup_id
+WHERE c.seq > :since AND c.op != 'delete'
+UNION ALL
+SELECT seq, op, startup_id, name, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL
+FROM startup_changes
+WHERE seq > :since AND op = 'delete'
+ORDER BY change_seq
+'''
+
+MAX_CHANGE_SEQ_QUERY = "SELECT COALESCE(MAX(seq), 0) FROM startup_changes"
+
+REVENUE_HISTORY_QUERY = '''
+SELECT revenue_period, revenue_amount, metric_type, data_date, confidence_score
+FROM revenue_tracking
+WHERE startup_id = ?
+ORDER BY data_date
+'''
+
+# Reads startups_data directly: through the view the planner skips the covering index
+DASHBOARD_FROM = '''
+FROM startups_data s
+LEFT JOIN industries industry ON industry.id = s.industry_id
+LEFT JOIN stages stage ON stage.id = s.stage_id
+'''
+
+DASHBOARD_COLUMNS = {
+    'name': 's.name',
+    'industry': 'industry.name',
+    'stage': 'stage.name',
+    'revenue_estimate': 's.revenue_estimate',
+    'growth_rate': 's.growth_rate',
+    'funding_raised': 's.funding_raised',
+}
+
+DASHBOARD_STARTUPS_QUERY = f"SELECT {', '.join(f'{sql} as {name}' for name, sql in DASHBOARD_COLUMNS.items())}" \
+    + DASHBOARD_FROM
+
+HAS_STARTUPS_QUERY = "SELECT 1 FROM startups_data LIMIT 1"
+
+@dataclass(frozen=True)
+class DashboardFilters:
+    """Dashboard sidebar selections; None means unfiltered. Hashable, so usable as a cache key"""
+    industry: Optional[str] = None
+    stage: Optional[str] = None
+    min_revenue: Optional[float] = None
+    max_revenue: Optional[float] = None
+
+def _dashboard_where(filters: DashboardFilters) -> Tuple[str, Dict]:
+    """WHERE clause for the set filters only; an OR per optional filter would keep SQLite off the indexes"""
+    # Names resolve to ids once, so the predicates hit the (industry_id, stage_id, revenue_estimate) index
+    conditions = {
+        'industry': "s.industry_id = (SELECT id FROM industries WHERE name = :industry)",
+        'stage': "s.stage_id = (SELECT id FROM stages WHERE name = :stage)",
+        'min_revenue': "s.revenue_estimate >= :min_revenue",
+        'max_revenue': "s.revenue_estimate <= :max_revenue",
+    }
+    params = {name: value for name, value in vars(filters).items() if value is not None}
+    return (f"WHERE {' AND '.join(conditions[name] for name in params)}" if params else ""), params
+
+def dashboard_startups_query(filters: DashboardFilters, columns: Sequence[str] = tuple(DASHBOARD_COLUMNS),
+                             limit: int = -1) -> Tuple[str, Dict]:
+    """SQL and parameters for the filtered startups, with only ``columns``, at most ``limit`` rows"""
+    where, params = _dashboard_where(filters)
+    select = ', '.join(f"{DASHBOARD_COLUMNS[name]} as {name}" for name in columns)
+    return f"SELECT {select}{DASHBOARD_FROM}{where}\nLIMIT :limit", {**params, 'limit': limit}
+
+def dashboard_breakdown_query(filters: DashboardFilters) -> Tuple[str, Dict]:
+    """SQL and parameters for startup counts and revenue totals of the filtered startups per industry and stage"""
+    where, params = _dashboard_where(filters)
+    return f'''
+SELECT industry.name as industry, stage.name as stage, COUNT(*) as startup_count,
+       COUNT(s.revenue_estimate) as revenue_count, SUM(s.revenue_estimate) as revenue_sum{DASHBOARD_FROM}{where}
+GROUP BY s.industry_id, s.stage_id
+''', params
+
+# Every filter set, the variant whose plan matters most
+ALL_DASHBOARD_FILTERS = DashboardFilters('industry', 'stage', 0, 1)
+
+WATERMARK_QUERY = "SELECT watermark FROM source_state WHERE source = ? AND query = ?"
+
+QUERY_SHARDS_QUERY = '''
+SELECT start_date, end_date, total_count FROM github_query_shards
+WHERE base_query = ?
+ORDER BY start_date
+'''
+
+MAX_STARTUP_ID_QUERY = "SELECT COALESCE(MAX(id), 0) FROM startups_data"
+
+STARTUPS_AFTER_ID_QUERY = "SELECT COUNT(*) FROM startups_data WHERE id > ?"
+
+# Every read the application issues, by name, for check_query_plans
+SHIPPED_QUERIES = {
+    'rollups': ROLLUPS_QUERY,
+    'export': EXPORT_QUERY,
+    'changes_since': CHANGES_SINCE_QUERY,
+    'max_change_seq': MAX_CHANGE_SEQ_QUERY,
+    'revenue_history': REVENUE_HISTORY_QUERY,
+    'dashboard_startups': DASHBOARD_STARTUPS_QUERY,
+    'dashboard_startups_filtered': dashboard_startups_query(ALL_DASHBOARD_FILTERS)[0],
+    'dashboard_breakdown': dashboard_breakdown_query(DashboardFilters())[0],
+    'dashboard_breakdown_filtered': dashboard_breakdown_query(ALL_DASHBOARD_FILTERS)[0],
+    'has_startups': HAS_STARTUPS_QUERY,
+    'watermark': WATERMARK_QUERY,
+    'query_shards': QUERY_SHARDS_QUERY,
+    'max_startup_id': MAX_STARTUP_ID_QUERY,
+    'startups_after_id': STARTUPS_AFTER_ID_QUERY,
+    'rollup_recompute': RECOMPUTE_QUERY,
+    'lsh_buckets': LSH_BUCKETS_QUERY,
+    'unsigned_sources': UNSIGNED_SOURCES_QUERY,
+}
+
+# Tables small enough by design that a full scan is the right plan
+SMALL_TABLES = {'industry_stage_rollups', 'industries', 'stages', 'sources', 'revenue_models', 'locations'}
+
+_TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+_NOT_ALIASES = {'ON', 'USING', 'WHERE', 'GROUP', 'ORDER', 'LIMIT', 'UNION', 'INDEXED', 'NOT',
+                'LEFT', 'INNER', 'CROSS', 'NATURAL', 'JOIN'}
+
+def _plan_tables(conn: sqlite3.Connection, sql: str) -> Dict[str, str]:
+    """Table behind every name a query's plan can show: its tables, their aliases and those of views it reads"""
+    views = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'view'"))
+    tables: Dict[str, str] = {}
+    pending = [sql]
+    while pending:
+        for table, alias in _TABLE_REFERENCE.findall(pending.pop()):
+            if table in views and table not in tables:
+                pending.append(views[table])
+            tables.setdefault(table, table)
+            if alias and alias.upper() not in _NOT_ALIASES:
+                tables.setdefault(alias, table)
+    return tables
+
+def apply_index_set(conn: sqlite3.Connection):
+    """Create missing indexes, and on a version change drop retired ones and refresh statistics"""
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_meta (key TEXT PRIMARY KEY, value TEXT)")
+    row = conn.execute("SELECT value FROM schema_meta WHERE key = 'index_set_version'").fetchone()
+    applied = int(row[0]) if row else 0
+
+    for name, target in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+    if applied != INDEX_SET_VERSION:
+        for name in RETIRED_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute("ANALYZE")
+        conn.execute("INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('index_set_version', ?)",
+                     (str(INDEX_SET_VERSION),))
+        logger.info(f"Applied index set version {INDEX_SET_VERSION} (was {applied})")
+
+def check_query_plans(conn: sqlite3.Connection) -> List[str]:
+    """Return a problem for every shipped query that scans a large table without an index"""
+    problems = []
+    for name, sql in SHIPPED_QUERIES.items():
+        names = re.findall(r':(\w+)', sql)
+        params = dict.fromkeys(names) if names else [None] * sql.count('?')
+        tables = _plan_tables(conn, sql)
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+            detail = row[3]
+            # "SCAN s" is a full scan of the table aliased s; "SCAN s USING ... INDEX" walks an index
+            scanned = detail.split()[1] if detail.startswith('SCAN ') else None
+            if scanned and tables.get(scanned, scanned) not in SMALL_TABLES and 'USING' not in detail:
+                problems.append(f"{name}: {detail}")
+    return problems
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    if len(sys.argv) > 1:
+        db_path = sys.argv[1]
+    else:
+        # Check the schema as setup_database creates it today
+        from http_cache import ResponseCache
+        from rate_limiter import RateLimiter
+        from startup_tracker import StartupTracker
+        workdir = tempfile.mkdtemp(prefix="query_plans_")
+        db_path = os.path.join(workdir, "startup_data.db")
+        StartupTracker(db_path, rate_limiter=RateLimiter(os.path.join(workdir, "rate_limit_state.json")),
+                       response_cache=ResponseCache(os.path.join(workdir, "http_cache.db")))
+
+    conn = sqlite3.connect(db_path)
+    problems = check_query_plans(conn)
+    conn.close()
+
+    for problem in problems:
+        print(f"FULL SCAN  {problem}")
+    print(f"Checked {len(SHIPPED_QUERIES)} queries against {db_path}: "
+          f"{'OK' if not problems else f'{len(problems)} full table scans'}")
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Shared rate limiting for startup data sources
+Token buckets keyed per source, persisted across restarts and corrected from API response headers
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = "rate_limit_state.json"
+
+# How often acquire() writes the bucket state back to disk
+SAVE_INTERVAL_SECONDS = 5.0
+
+class TokenBucket:
+    """Token bucket refilled continuously at an hourly rate"""
+
+    def __init__(self, rate_per_hour: float, tokens: Optional[float] = None,
+                 updated_at: Optional[float] = None, blocked_until: float = 0.0, window_reset: float = 0.0):
+        self.capacity = float(rate_per_hour)
+        self.refill_per_second = rate_per_hour / 3600.0
+        self.tokens = self.capacity if tokens is None else min(float(tokens), self.capacity)
+        self.updated_at = time.time() if updated_at is None else updated_at
+        self.blocked_until = blocked_until  # set when the server reports an exhausted budget
+        self.window_reset = window_reset  # last X-RateLimit-Reset seen
+
+    def refill(self, now: float):
+        """Add the tokens earned since the last update"""
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def try_consume(self, tokens: float, now: float) -> float:
+        """Consume tokens if available; otherwise return the seconds to wait"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        self.refill(now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.refill_per_second
+
+    def to_dict(self) -> Dict:
+        return {
+            'rate_per_hour': self.capacity,
+            'tokens': self.tokens,
+            'updated_at': self.updated_at,
+            'blocked_until': self.blocked_until,
+            'window_reset': self.window_reset
+        }
+
+class RateLimiter:
+    """Per-source token buckets shared by every coroutine that calls a source API"""
+
+    def __init__(self, state_path: str = DEFAULT_STATE_PATH):
+        self.state_path = state_path
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()  # dashboard sessions may share the limiter across threads
+        self._last_save = 0.0
+        self._saved_state = self._load_state()
+
+    def configure(self, source: str, rate_per_hour: float):
+        """Register a source, restoring its remaining budget from the previous process"""
+        with self._lock:
+            bucket = self.buckets.get(source)
+            if bucket is not None:
+                if bucket.capacity != rate_per_hour:
+                    bucket.refill(time.time())
+                    self.buckets[source] = TokenBucket(rate_per_hour, bucket.tokens, bucket.updated_at,
+                                                       bucket.blocked_until, bucket.window_reset)
+                return
+
+            saved = self._saved_state.get(source)
+            if saved:
+                self.buckets[source] = TokenBucket(
+                    rate_per_hour,
+                    tokens=saved.get('tokens'),
+                    updated_at=saved.get('updated_at'),
+                    blocked_until=saved.get('blocked_until', 0.0),
+                    window_reset=saved.get('window_reset', 0.0)
+                )
+            else:
+                self.buckets[source] = TokenBucket(rate_per_hour)
+
+    async def acquire(self, source: str, tokens: float = 1.0):
+        """Wait until the source has budget for a request, then spend it"""
+        while True:
+            with self._lock:
+                now = time.time()
+                wait = self.buckets[source].try_consume(tokens, now)
+
+            if wait <= 0:
+                if now - self._last_save >= SAVE_INTERVAL_SECONDS:
+                    self.save()
+                return
+
+            logger.info(f"Rate limit reached for {source}; waiting {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+    def refund(self, source: str, tokens: float = 1.0):
+        """Return budget for a request the API did not charge for"""
+        with self._lock:
+            bucket = self.buckets[source]
+            bucket.tokens = min(bucket.capacity, bucket.tokens + tokens)
+
+    def update_from_headers(self, source: str, status: int, headers: Mapping[str, str]):
+        """Correct the bucket from X-RateLimit-* and Retry-After response headers"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        retry_after = headers.get('Retry-After')
+
+        with self._lock:
+            bucket = self.buckets[source]
+            now = time.time()
+            bucket.refill(now)
+
+            if remaining is not None:
+                remaining = float(remaining)
+                reset_at = float(reset) if reset is not None else 0.0
+                if reset_at > bucket.window_reset:
+                    # A new server window: trust its count, even if higher than ours
+                    bucket.window_reset = reset_at
+                    bucket.tokens = min(bucket.capacity, remaining)
+                else:
+                    # Responses can arrive out of order; only ever lower the estimate
+                    bucket.tokens = min(bucket.tokens, remaining)
+
+                if remaining <= 0 and reset_at > now:
+                    bucket.blocked_until = max(bucket.blocked_until, reset_at)
+
+            if status in (403, 429) and retry_after is not None:
+                bucket.blocked_until = max(bucket.blocked_until, now + float(retry_after))
+
+        if status in (403, 429):
+            logger.warning(f"{source} responded {status}; pausing until budget resets")
+
+    def save(self):
+        """Persist every bucket so the next process starts with the remaining budget"""
+        with self._lock:
+            state = {**self._saved_state, **{name: b.to_dict() for name, b in self.buckets.items()}}
+            self._last_save = time.time()
+
+        try:
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.error(f"Error saving rate limit state: {e}")
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable rate limit state {self.state_path}: {e}")
+            return {}
+
+_limiters: Dict[str, RateLimiter] = {}
+
+def get_rate_limiter(state_path: str = DEFAULT_STATE_PATH) -> RateLimiter:
+    """Return the process-wide limiter for a state file"""
+    key = os.path.abspath(state_path)
+    if key not in _limiters:
+        _limiters[key] = RateLimiter(state_path)
+    return _limiters[key]
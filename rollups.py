@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained per-industry/stage aggregates of the stored startups
+Running counts, sums and min/max are kept current per saved batch (batched_rollups) and by triggers for every
+other write, so insights read O(#groups) rows
+"""
+
+import logging
+import math
+import sqlite3
+import sys
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = '''
+CREATE TABLE IF NOT EXISTS industry_stage_rollups (
+    industry_id INTEGER,
+    stage_id INTEGER,
+    startup_count INTEGER NOT NULL DEFAULT 0,
+    revenue_count INTEGER NOT NULL DEFAULT 0,
+    revenue_sum REAL NOT NULL DEFAULT 0.0,
+    revenue_min REAL,
+    revenue_max REAL,
+    growth_count INTEGER NOT NULL DEFAULT 0,
+    growth_sum REAL NOT NULL DEFAULT 0.0,
+    funding_count INTEGER NOT NULL DEFAULT 0,
+    funding_sum REAL NOT NULL DEFAULT 0.0
+)
+'''
+
+# industry/stage may be NULL, so groups are matched with IS rather than a primary key
+ROLLUP_INDEX = "CREATE INDEX IF NOT EXISTS idx_rollups_group ON industry_stage_rollups (industry_id, stage_id)"
+
+# Holds a row only inside a batched_rollups block, whose transaction maintains the rollups itself;
+# the triggers skip rows written meanwhile
+DEFERRAL_TABLE = "CREATE TABLE IF NOT EXISTS rollups_deferred (id INTEGER PRIMARY KEY CHECK (id = 1))"
+TRIGGERS_ACTIVE = "WHEN NOT EXISTS (SELECT 1 FROM rollups_deferred)"
+
+# Groups the rollups from scratch; used to rebuild and to verify them
+RECOMPUTE_QUERY = '''
+SELECT industry_id, stage_id,
+       COUNT(*) as startup_count,
+       COUNT(revenue_estimate) as revenue_count,
+       TOTAL(revenue_estimate) as revenue_sum,
+       MIN(revenue_estimate) as revenue_min,
+       MAX(revenue_estimate) as revenue_max,
+       COUNT(growth_rate) as growth_count,
+       TOTAL(growth_rate) as growth_sum,
+       COUNT(funding_raised) as funding_count,
+       TOTAL(funding_raised) as funding_sum
+FROM startups_data
+GROUP BY industry_id, stage_id
+'''
+
+ROLLUP_COLUMNS = ['industry_id', 'stage_id', 'startup_count', 'revenue_count', 'revenue_sum', 'revenue_min',
+                  'revenue_max', 'growth_count', 'growth_sum', 'funding_count', 'funding_sum']
+
+# Columns whose changes move a startup between groups or alter its contribution
+TRACKED_COLUMNS = ['industry_id', 'stage_id', 'revenue_estimate', 'growth_rate', 'funding_raised']
+
+def _add(row: str) -> str:
+    """Trigger statements adding the startup ``row`` (NEW or OLD) to its group"""
+    group = f"industry_id IS {row}.industry_id AND stage_id IS {row}.stage_id"
+    revenue = f"{row}.revenue_estimate"
+    return f'''
+    INSERT INTO industry_stage_rollups (industry_id, stage_id)
+    SELECT {row}.industry_id, {row}.stage_id
+    WHERE NOT EXISTS (SELECT 1 FROM industry_stage_rollups WHERE {group});
+    UPDATE industry_stage_rollups SET
+        startup_count = startup_count + 1,
+        revenue_count = revenue_count + ({revenue} IS NOT NULL),
+        revenue_sum = revenue_sum + IFNULL({revenue}, 0),
+        revenue_min = CASE WHEN {revenue} IS NULL THEN revenue_min ELSE MIN(IFNULL(revenue_min, {revenue}), {revenue}) END,
+        revenue_max = CASE WHEN {revenue} IS NULL THEN revenue_max ELSE MAX(IFNULL(revenue_max, {revenue}), {revenue}) END,
+        growth_count = growth_count + ({row}.growth_rate IS NOT NULL),
+        growth_sum = growth_sum + IFNULL({row}.growth_rate, 0),
+        funding_count = funding_count + ({row}.funding_raised IS NOT NULL),
+        funding_sum = funding_sum + IFNULL({row}.funding_raised, 0)
+    WHERE {group};'''
+
+def _remove(row: str) -> str:
+    """Trigger statements removing the startup ``row`` from its group
+
+    Runs after the row has left startups_data, so a min/max it held is
+    recomputed from the remaining rows through idx_startups_data_industry_stage_revenue.
+    """
+    group = f"industry_id IS {row}.industry_id AND stage_id IS {row}.stage_id"
+    revenue = f"{row}.revenue_estimate"
+    remaining = f"FROM startups_data WHERE {group}"
+    return f'''
+    UPDATE industry_stage_rollups SET
+        startup_count = startup_count - 1,
+        revenue_count = revenue_count - ({revenue} IS NOT NULL),
+        revenue_sum = revenue_sum - IFNULL({revenue}, 0),
+        revenue_min = CASE WHEN {revenue} <= revenue_min THEN (SELECT MIN(revenue_estimate) {remaining})
+                           ELSE revenue_min END,
+        revenue_max = CASE WHEN {revenue} >= revenue_max THEN (SELECT MAX(revenue_estimate) {remaining})
+                           ELSE revenue_max END,
+        growth_count = growth_count - ({row}.growth_rate IS NOT NULL),
+        growth_sum = growth_sum - IFNULL({row}.growth_rate, 0),
+        funding_count = funding_count - ({row}.funding_raised IS NOT NULL),
+        funding_sum = funding_sum - IFNULL({row}.funding_raised, 0)
+    WHERE {group};
+    DELETE FROM industry_stage_rollups WHERE {group} AND startup_count <= 0;'''
+
+ROLLUP_TRIGGERS = {
+    'trg_rollups_insert': f"AFTER INSERT ON startups_data {TRIGGERS_ACTIVE} BEGIN {_add('NEW')}\nEND",
+    'trg_rollups_delete': f"AFTER DELETE ON startups_data {TRIGGERS_ACTIVE} BEGIN {_remove('OLD')}\nEND",
+    'trg_rollups_update': f"AFTER UPDATE OF {', '.join(TRACKED_COLUMNS)} ON startups_data {TRIGGERS_ACTIVE} BEGIN "
+                          f"{_remove('OLD')}{_add('NEW')}\nEND",
+}
+
+def create_rollups(conn: sqlite3.Connection):
+    """Create the rollup table and triggers, building the rollups if the table is new"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'industry_stage_rollups'"
+    ).fetchone()
+    conn.execute(ROLLUP_TABLE)
+    conn.execute(ROLLUP_INDEX)
+    conn.execute(DEFERRAL_TABLE)
+    for name, body in ROLLUP_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    if not exists:
+        rebuild_rollups(conn)
+
+def replace_rollup_triggers(conn: sqlite3.Connection):
+    """Recreate the rollup triggers from ROLLUP_TRIGGERS, e.g. after their definition changed"""
+    for name in ROLLUP_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    create_rollups(conn)
+
+# A batch's contribution per group: startup, revenue, growth and funding counts and sums, revenue min and max
+GROUP_TOTALS_QUERY = '''
+SELECT industry_id, stage_id, COUNT(*), COUNT(revenue_estimate), TOTAL(revenue_estimate),
+       COUNT(growth_rate), TOTAL(growth_rate), COUNT(funding_raised), TOTAL(funding_raised),
+       MIN(revenue_estimate), MAX(revenue_estimate)
+FROM startups_data
+WHERE entity_key IN ({keys})
+GROUP BY industry_id, stage_id
+'''
+
+DELTA_COLUMNS = ['startup_count', 'revenue_count', 'revenue_sum', 'growth_count', 'growth_sum',
+                 'funding_count', 'funding_sum']
+
+SQL_VARIABLE_CHUNK = 500
+
+def _group_totals(conn: sqlite3.Connection, entity_keys: Sequence[str]) -> Dict[Tuple, list]:
+    totals: Dict[Tuple, list] = {}
+    keys = sorted(set(entity_keys))
+    for start in range(0, len(keys), SQL_VARIABLE_CHUNK):
+        chunk = keys[start:start + SQL_VARIABLE_CHUNK]
+        for industry_id, stage_id, *values in conn.execute(
+            GROUP_TOTALS_QUERY.format(keys=', '.join('?' * len(chunk))), chunk
+        ):
+            sums, extremes = values[:len(DELTA_COLUMNS)], values[len(DELTA_COLUMNS):]
+            group = totals.setdefault((industry_id, stage_id), [0] * len(DELTA_COLUMNS) + [set()])
+            group[:len(DELTA_COLUMNS)] = [a + b for a, b in zip(group, sums)]
+            group[-1].update(extreme for extreme in extremes if extreme is not None)
+    return totals
+
+@contextmanager
+def batched_rollups(conn: sqlite3.Connection, entity_keys: Sequence[str]) -> Iterator[None]:
+    """Maintain the rollups for a batch of startups written by entity key in the block, instead of per row
+
+    The batch's rows are grouped before and after the block and each group
+    that changed gets the difference in one UPDATE; its min/max is re-read
+    through idx_startups_data_industry_stage_revenue. The triggers skip the
+    block's writes, so it must only write rows with these keys.
+    """
+    before = _group_totals(conn, entity_keys)
+    conn.execute("INSERT INTO rollups_deferred (id) VALUES (1)")
+    yield
+    conn.execute("DELETE FROM rollups_deferred")
+    after = _group_totals(conn, entity_keys)
+
+    empty = [0] * len(DELTA_COLUMNS) + [set()]
+    deltas = []
+    for group in before.keys() | after.keys():
+        old, new = before.get(group, empty), after.get(group, empty)
+        if old != new:
+            deltas.append((*group, *(b - a for a, b in zip(old[:-1], new[:-1]))))
+    if not deltas:
+        return
+
+    group = "industry_id IS :industry_id AND stage_id IS :stage_id"
+    revenue = f"FROM startups_data WHERE {group}"
+    extremes = f"(SELECT MIN(revenue_estimate) {revenue}), (SELECT MAX(revenue_estimate) {revenue})"
+    params = [dict(zip(['industry_id', 'stage_id'] + DELTA_COLUMNS, delta)) for delta in deltas]
+    # Every group gets an (empty) row first, so one UPDATE applies all deltas
+    conn.executemany(f'''
+    INSERT INTO industry_stage_rollups (industry_id, stage_id)
+    SELECT :industry_id, :stage_id WHERE NOT EXISTS (SELECT 1 FROM industry_stage_rollups WHERE {group})
+    ''', [{'industry_id': delta['industry_id'], 'stage_id': delta['stage_id']} for delta in params])
+    conn.executemany(f'''
+    UPDATE industry_stage_rollups SET
+        {', '.join(f"{column} = {column} + :{column}" for column in DELTA_COLUMNS)},
+        (revenue_min, revenue_max) = ({extremes})
+    WHERE {group}
+    ''', params)
+    conn.execute("DELETE FROM industry_stage_rollups WHERE startup_count <= 0")
+
+def rebuild_rollups(conn: sqlite3.Connection):
+    """Replace the rollups with a full recompute from startups_data"""
+    conn.execute("DELETE FROM industry_stage_rollups")
+    conn.execute(f"INSERT INTO industry_stage_rollups ({', '.join(ROLLUP_COLUMNS)}) {RECOMPUTE_QUERY}")
+    logger.info("Rebuilt industry/stage rollups")
+
+def verify_rollups(conn: sqlite3.Connection, rel_tol: float = 1e-6) -> List[str]:
+    """Compare the rollups to a full recompute, returning a description of each mismatch
+
+    Sums are compared with a relative tolerance, since adding and removing
+    floats in a different order than the recompute rounds differently.
+    """
+    def groups(sql: str):
+        return {(row[0], row[1]): row[2:] for row in conn.execute(sql)}
+
+    expected = groups(RECOMPUTE_QUERY)
+    actual = groups(f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM industry_stage_rollups")
+
+    problems = []
+    for group in expected.keys() | actual.keys():
+        if group not in actual:
+            problems.append(f"{group}: missing from rollups")
+        elif group not in expected:
+            problems.append(f"{group}: rollup for a group with no startups")
+        else:
+            for column, want, got in zip(ROLLUP_COLUMNS[2:], expected[group], actual[group]):
+                if want is None or got is None:
+                    matches = want is got
+                else:
+                    matches = math.isclose(want, got, rel_tol=rel_tol, abs_tol=1e-6)
+                if not matches:
+                    problems.append(f"{group}: {column} is {got}, recompute gives {want}")
+    return problems
+
+def main():
+    """Verify (or with --rebuild, rebuild) the rollups of a database: python rollups.py [db_path] [--rebuild]"""
+    logging.basicConfig(level=logging.INFO)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    db_path = args[0] if args else "startup_data.db"
+
+    conn = sqlite3.connect(db_path)
+    if '--rebuild' in sys.argv:
+        with conn:
+            rebuild_rollups(conn)
+    problems = verify_rollups(conn)
+    conn.close()
+
+    for problem in problems:
+        print(problem)
+    print(f"Rollups in {db_path}: {'OK' if not problems else f'{len(problems)} mismatches'}")
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Startup records as collected from the sources
+StartupData is one record; StartupBatch holds many column by column, with categorical values interned
+and numbers in typed arrays, so large sweeps keep a fraction of the per-record memory
+"""
+
+import math
+import sys
+import threading
+from array import array
+from dataclasses import dataclass, fields
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+@dataclass(slots=True)
+class StartupData:
+    """Data structure for startup information"""
+    name: str
+    industry: str
+    founded_date: str
+    revenue_estimate: Optional[float]
+    growth_rate: Optional[float]
+    funding_raised: Optional[float]
+    employee_count: Optional[int]
+    revenue_model: str
+    last_updated: str
+    source: str
+    stage: str
+    location: str
+    # Identity hints for entity resolution; not stored on the startup row itself
+    external_id: Optional[str] = None
+    homepage: Optional[str] = None
+    description: Optional[str] = None
+
+FIELDS = tuple(field.name for field in fields(StartupData))
+
+# Low-cardinality columns, stored as codes into the shared category pool
+CATEGORICAL_FIELDS = ('industry', 'founded_date', 'revenue_model', 'last_updated', 'source', 'stage', 'location')
+# Stored as doubles, NaN meaning None
+FLOAT_FIELDS = ('revenue_estimate', 'growth_rate', 'funding_raised')
+# Stored as 64-bit ints, MISSING_INT meaning None
+INT_FIELDS = ('employee_count',)
+# Mostly distinct per startup, so packed as UTF-8 into one buffer per column
+TEXT_FIELDS = ('name', 'external_id', 'homepage', 'description')
+
+MISSING_INT = -(1 << 63)
+
+class CategoryPool:
+    """Process-wide interned strings for categorical values; code 0 is None
+
+    Shared by every batch, so batches combine by copying codes, and a value
+    seen in a million records is one string object.
+    """
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self.codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self.codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self.codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(sys.intern(value))
+                    self.codes[value] = code
+        return code
+
+CATEGORIES = CategoryPool()
+
+class TextColumn:
+    """Strings packed end to end as UTF-8, Arrow style, instead of one Python object each"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array('q')
+        self.nulls = array('B')
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def append(self, value: Optional[str]):
+        if value is not None:
+            self.data += value.encode()
+        self.ends.append(len(self.data))
+        self.nulls.append(value is None)
+
+    def extend(self, other: 'TextColumn'):
+        offset = len(self.data)
+        self.data += other.data
+        self.ends.extend(end + offset for end in other.ends)
+        self.nulls.extend(other.nulls)
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if not -len(self) <= index < len(self):
+            raise IndexError("TextColumn index out of range")
+        # The start offset is the previous end, so a negative index has to be made absolute first
+        index %= len(self)
+        if self.nulls[index]:
+            return None
+        start = self.ends[index - 1] if index > 0 else 0
+        return self.data[start:self.ends[index]].decode()
+
+    def values(self) -> List[Optional[str]]:
+        data = self.data
+        start = 0
+        values = []
+        for end, null in zip(self.ends, self.nulls):
+            values.append(None if null else data[start:end].decode())
+            start = end
+        return values
+
+class StartupBatch:
+    """Columnar batch of startups
+
+    Accepts StartupData records (or another batch) through ``append`` and
+    ``extend``, iterates back as StartupData, and converts straight to row
+    tuples for SQL parameters or to a DataFrame with categorical columns.
+    """
+
+    def __init__(self, records: Iterable[StartupData] = ()):
+        self.categorical: Dict[str, array] = {name: array('I') for name in CATEGORICAL_FIELDS}
+        self.floats: Dict[str, array] = {name: array('d') for name in FLOAT_FIELDS}
+        self.ints: Dict[str, array] = {name: array('q') for name in INT_FIELDS}
+        self.text: Dict[str, TextColumn] = {name: TextColumn() for name in TEXT_FIELDS}
+        self.extend(records)
+
+    @classmethod
+    def of(cls, startups: Union['StartupBatch', Iterable[StartupData]]) -> 'StartupBatch':
+        """The batch itself, or a new batch holding the given records"""
+        return startups if isinstance(startups, StartupBatch) else cls(startups)
+
+    def __len__(self) -> int:
+        return len(self.text['name'])
+
+    def append(self, record: StartupData):
+        for name, codes in self.categorical.items():
+            codes.append(CATEGORIES.encode(getattr(record, name)))
+        for name, values in self.floats.items():
+            value = getattr(record, name)
+            values.append(math.nan if value is None else value)
+        for name, values in self.ints.items():
+            value = getattr(record, name)
+            values.append(MISSING_INT if value is None else value)
+        for name, values in self.text.items():
+            values.append(getattr(record, name))
+
+    def extend(self, records: Union['StartupBatch', Iterable[StartupData]]):
+        if isinstance(records, StartupBatch):
+            for columns, other in ((self.categorical, records.categorical), (self.floats, records.floats),
+                                   (self.ints, records.ints), (self.text, records.text)):
+                for name, values in columns.items():
+                    values.extend(other[name])
+            return
+        for record in records:
+            self.append(record)
+
+    def column(self, name: str) -> List:
+        """Values of one field, with None for missing"""
+        if name in self.categorical:
+            values = CATEGORIES.values
+            return [values[code] for code in self.categorical[name]]
+        if name in self.floats:
+            return [None if value != value else value for value in self.floats[name]]
+        if name in self.ints:
+            return [None if value == MISSING_INT else value for value in self.ints[name]]
+        return self.text[name].values()
+
+    def rows(self, columns: Sequence[str] = FIELDS) -> List[Tuple]:
+        """One tuple per startup with the given fields, e.g. as executemany parameters"""
+        return list(zip(*(self.column(name) for name in columns)))
+
+    def __iter__(self) -> Iterator[StartupData]:
+        return (StartupData(*row) for row in zip(*(self.column(name) for name in FIELDS)))
+
+    def __getitem__(self, index: int) -> StartupData:
+        return StartupData(*(self._value(name, index) for name in FIELDS))
+
+    def _value(self, name: str, index: int):
+        if name in self.categorical:
+            return CATEGORIES.values[self.categorical[name][index]]
+        if name in self.floats:
+            value = self.floats[name][index]
+            return None if value != value else value
+        if name in self.ints:
+            value = self.ints[name][index]
+            return None if value == MISSING_INT else value
+        return self.text[name][index]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame in StartupData field order, with pandas categoricals for the categorical fields"""
+        data = {}
+        for name in FIELDS:
+            if name in self.categorical:
+                used, codes = np.unique(np.frombuffer(self.categorical[name], dtype=np.uint32), return_inverse=True)
+                has_none = len(used) > 0 and used[0] == 0
+                # Pool code 0 (None) becomes -1, pandas' missing code
+                categories = pd.Index([CATEGORIES.values[code] for code in used[int(has_none):]], dtype=object)
+                data[name] = pd.Categorical.from_codes(codes.astype(np.int64) - int(has_none), categories=categories)
+            elif name in self.floats:
+                data[name] = np.frombuffer(self.floats[name], dtype=np.float64).copy()
+            elif name in self.ints:
+                values = np.frombuffer(self.ints[name], dtype=np.int64)
+                data[name] = pd.arrays.IntegerArray(values.copy(), values == MISSING_INT)
+            else:
+                data[name] = self.text[name].values()
+        return pd.DataFrame(data, columns=list(FIELDS))
+
+    @classmethod
+    def from_dataframe(cls, frame: pd.DataFrame) -> 'StartupBatch':
+        """Batch from a DataFrame with StartupData columns; missing optional columns are None"""
+        batch = cls()
+        for name in FIELDS:
+            if name in frame:
+                values = frame[name].astype(object).where(frame[name].notna(), None).tolist()
+            else:
+                values = [None] * len(frame)
+            if name in batch.categorical:
+                batch.categorical[name].extend(CATEGORIES.encode(value) for value in values)
+            elif name in batch.floats:
+                batch.floats[name].extend(math.nan if value is None else float(value) for value in values)
+            elif name in batch.ints:
+                batch.ints[name].extend(MISSING_INT if value is None else int(value) for value in values)
+            else:
+                for value in values:
+                    batch.text[name].append(value)
+        return batch
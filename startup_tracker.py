@@ -4,68 +4,534 @@ Startup Revenue Insights Tracker
 Monitors and analyzes startup revenue data from multiple sources
 """
 
+import argparse
 import requests
 import pandas as pd
+import numpy as np
 import json
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import logging
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Type, Union
 import asyncio
-import aiohttp
-from dataclasses import dataclass
+import csv
+import gzip
+import time
+from dataclasses import dataclass, field
 import sqlite3
 import os
+import re
+
+from database import ConnectionManager, get_connection_manager
+from entity_resolution import (
+    MergeCandidate, MinHasher, find_merge_candidates, index_unsigned_sources, merge_entities, record_sources,
+    resolve_entities
+)
+from http_cache import CachedSession, ResponseCache, get_response_cache
+from migrations import migrate
+from queries import (
+    CHANGES_SINCE_QUERY, EXPORT_QUERY, MAX_CHANGE_SEQ_QUERY, MAX_STARTUP_ID_QUERY, QUERY_SHARDS_QUERY, REVENUE_HISTORY_QUERY, ROLLUPS_QUERY,
+    STARTUPS_AFTER_ID_QUERY, WATERMARK_QUERY
+)
+from rate_limiter import RateLimiter, get_rate_limiter
+from rollups import batched_rollups, rebuild_rollups, verify_rollups
+from startup_records import StartupBatch, StartupData
+from startups_schema import normalize_rows, stored_column
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Columns written by save_startup_data, in StartupData field order
+STARTUP_COLUMNS = (
+    'name', 'industry', 'founded_date', 'revenue_estimate', 'growth_rate', 'funding_raised',
+    'employee_count', 'revenue_model', 'last_updated', 'source', 'stage', 'location'
+)
+
+# Startup filter indicators read from repository fields rather than the description
+REPO_INDICATORS = ('stars', 'forks', 'has_wiki', 'homepage')
+
+# GitHub's search API never returns more than this many results per query
+GITHUB_SEARCH_RESULT_CAP = 1000
+
+# Industry keyword mapping, in priority order for ties
+INDUSTRY_KEYWORDS = {
+    'SaaS': ['saas', 'software as a service', 'cloud software'],
+    'AI/ML': ['ai', 'artificial intelligence', 'machine learning', 'ml', 'deep learning', 'neural network'],
+    'FinTech': ['fintech', 'financial', 'banking', 'payment', 'crypto', 'blockchain'],
+    'HealthTech': ['health', 'medical', 'healthcare', 'telemedicine', 'wellness'],
+    'EdTech': ['education', 'learning', 'teaching', 'school', 'university'],
+    'Developer Tools': ['developer', 'programming', 'coding', 'api', 'devops', 'ci/cd'],
+    'E-commerce': ['ecommerce', 'e-commerce', 'retail', 'shopping', 'marketplace'],
+    'Marketing Tech': ['marketing', 'advertising', 'social media', 'analytics', 'seo'],
+    'Cybersecurity': ['security', 'cybersecurity', 'encryption', 'privacy', 'firewall'],
+    'ClimaTech': ['climate', 'sustainability', 'green', 'environment', 'carbon'],
+}
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Build a regex alternation that shares common prefixes, so matching walks a trie"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+    
+    def build(node: Dict) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{pattern})?" if terminal else pattern
+    
+    return build(trie)
+
+class IndustryClassifier:
+    """Keyword industry classifier compiled once into a single word-bounded regex
+
+    Keywords only match as whole words (an optional plural "s" is allowed),
+    so ``ai`` no longer matches inside "maintain". The industry with the most
+    keyword hits wins; ties go to the earlier industry in the mapping.
+    """
+    
+    def __init__(self, keywords: Dict[str, List[str]] = INDUSTRY_KEYWORDS):
+        self.industries = list(keywords)
+        self.keyword_index: Dict[str, int] = {}
+        for index, industry in enumerate(self.industries):
+            for keyword in keywords[industry]:
+                self.keyword_index.setdefault(keyword, index)
+        
+        # The trie prefers the longest keyword, so "machine learning" is not also counted as "learning"
+        self.pattern = re.compile(
+            rf"(?<![a-z0-9])({_trie_regex(self.keyword_index)})s?(?![a-z0-9])"
+        )
+    
+    def classify(self, text: str) -> Tuple[str, int]:
+        """Return the best industry for a text and its number of keyword hits"""
+        hits = [0] * len(self.industries)
+        for keyword in self.pattern.findall(text.lower()):
+            hits[self.keyword_index[keyword]] += 1
+        
+        best = max(range(len(hits)), key=hits.__getitem__)
+        if hits[best] == 0:
+            return 'Other', 0
+        return self.industries[best], hits[best]
+    
+    def classify_many(self, texts: Iterable[str]) -> List[Tuple[str, int]]:
+        """Classify a batch of texts, returning ``(industry, score)`` for each"""
+        classify = self.classify
+        return [classify(text) for text in texts]
+
 @dataclass
-class StartupData:
-    """Data structure for startup information"""
-    name: str
-    industry: str
-    founded_date: str
-    revenue_estimate: Optional[float]
-    growth_rate: Optional[float]
-    funding_raised: Optional[float]
-    employee_count: Optional[int]
-    revenue_model: str
-    last_updated: str
-    source: str
-    stage: str
-    location: str
+class GitHubSweepResult:
+    """Outcome of fetching one or more GitHub search shards"""
+    shards: List[Tuple[date, date, int]] = field(default_factory=list)
+    startups: StartupBatch = field(default_factory=StartupBatch)  # only kept when nothing streams them
+    found: int = 0
+    latest_pushed_at: str = ''  # high-water mark of pushed_at across every item seen
+    complete: bool = True  # False if any page failed
+    
+    def merge(self, other: 'GitHubSweepResult'):
+        self.shards.extend(other.shards)
+        self.startups.extend(other.startups)
+        self.found += other.found
+        self.latest_pushed_at = max(self.latest_pushed_at, other.latest_pushed_at)
+        self.complete = self.complete and other.complete
+
+class GitHubQueryPlanner:
+    """Split a GitHub search query into ``created:`` date-range shards
+
+    GitHub search never returns more than ``GITHUB_SEARCH_RESULT_CAP`` results
+    per query, so the date range is halved recursively until every shard's
+    ``total_count`` fits under the cap. Shard boundaries are stored in the
+    ``github_query_shards`` table and reused by later runs, which then only
+    probe the days added since the last run.
+
+    A range whose probe fails is left out of the plan and recorded in
+    ``failed_ranges``; a sweep with failed ranges is incomplete.
+    """
+    
+    def __init__(self, db: ConnectionManager, probe: Callable[[str], Awaitable[Optional[int]]]):
+        self.db = db
+        self.probe = probe  # returns total_count for a query, or None on error
+        self.api_calls = 0
+        self.failed_ranges: List[Tuple[date, date]] = []
+    
+    @staticmethod
+    def shard_query(base_query: str, start: date, end: date) -> str:
+        """Build the search query for a single shard"""
+        return f"{base_query} created:{start.isoformat()}..{end.isoformat()}"
+    
+    async def plan(self, base_query: str, start: date, end: date,
+                   remember: bool = True) -> List[Tuple[date, date, int]]:
+        """Return ``(start, end, total_count)`` shards covering ``start..end``
+
+        With ``remember=False`` (one-off queries such as incremental deltas)
+        stored shards are ignored and the range is probed from scratch.
+        """
+        shards = self.load_shards(base_query, start) if remember else []
+        covered_until = shards[-1][1] if shards else start - timedelta(days=1)
+        
+        if covered_until < end:
+            # Only the range added since the last run needs probing
+            shards.extend(await self.split(base_query, covered_until + timedelta(days=1), end))
+        
+        logger.info(f"Planned {len(shards)} GitHub shards for '{base_query}' "
+                    f"({self.api_calls} probe requests)")
+        return shards
+    
+    async def split(self, base_query: str, start: date, end: date,
+                    total_count: Optional[int] = None) -> List[Tuple[date, date, int]]:
+        """Recursively split ``start..end`` until each shard is under the result cap"""
+        if total_count is None:
+            self.api_calls += 1
+            total_count = await self.probe(self.shard_query(base_query, start, end))
+            if total_count is None:
+                logger.error(f"Could not probe '{base_query}' for {start}..{end}; range skipped this run")
+                self.failed_ranges.append((start, end))
+                return []
+        
+        if total_count <= GITHUB_SEARCH_RESULT_CAP or start >= end:
+            if total_count > GITHUB_SEARCH_RESULT_CAP:
+                logger.warning(f"Shard {start} has {total_count} results; only the first "
+                               f"{GITHUB_SEARCH_RESULT_CAP} are reachable")
+            return [(start, end, total_count)]
+        
+        middle = start + (end - start) // 2
+        halves = await asyncio.gather(
+            self.split(base_query, start, middle),
+            self.split(base_query, middle + timedelta(days=1), end)
+        )
+        return halves[0] + halves[1]
+    
+    def load_shards(self, base_query: str, start: date) -> List[Tuple[date, date, int]]:
+        """Load remembered shards, discarding them unless they tile the range from ``start``"""
+        with self.db.reader() as conn:
+            rows = conn.execute(QUERY_SHARDS_QUERY, (base_query,)).fetchall()
+        
+        shards = [(date.fromisoformat(s), date.fromisoformat(e), count) for s, e, count in rows]
+        expected = start
+        for shard_start, shard_end, _ in shards:
+            if shard_start != expected:
+                return []
+            expected = shard_end + timedelta(days=1)
+        return shards
+    
+    def save_shards(self, base_query: str, shards: List[Tuple[date, date, int]]):
+        """Remember shard boundaries for later runs"""
+        with self.db.writer() as conn:
+            conn.execute("DELETE FROM github_query_shards WHERE base_query = ?", (base_query,))
+            conn.executemany('''
+            INSERT INTO github_query_shards (base_query, start_date, end_date, total_count, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ''', [(base_query, s.isoformat(), e.isoformat(), count, datetime.now().isoformat())
+                  for s, e, count in shards])
+
+EXPORT_FORMATS = ('json', 'ndjson', 'csv', 'parquet')
+EXPORT_CHUNK_SIZE = 10000
+
+# Parquet column types for the numeric startups columns; every other column is exported as a string
+EXPORT_COLUMN_TYPES = {
+    'change_seq': 'int64',
+    'id': 'int64',
+    'employee_count': 'int64',
+    'revenue_estimate': 'float64',
+    'growth_rate': 'float64',
+    'funding_raised': 'float64'
+}
+
+def _write_text_export(f: TextIO, format: str, columns: List[str], chunks: Iterator[List[Tuple]]) -> int:
+    """Write row chunks as CSV, NDJSON or one JSON array, returning the number of rows"""
+    rows = 0
+    if format == 'csv':
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+        return rows
+    
+    separator = ',\n' if format == 'json' else '\n'
+    if format == 'json':
+        f.write('[\n')
+    for chunk in chunks:
+        if rows:
+            f.write(separator)
+        f.write(separator.join(json.dumps(dict(zip(columns, row))) for row in chunk))
+        rows += len(chunk)
+    f.write('\n]\n' if format == 'json' else '\n' if rows else '')
+    return rows
+
+def _write_parquet_export(filename: str, columns: List[str], chunks: Iterator[List[Tuple]],
+                          compression: str) -> int:
+    """Write each row chunk as a Parquet row group, returning the number of rows"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export requires pyarrow (pip install pyarrow)") from None
+    
+    schema = pa.schema([(column, pa.type_for_alias(EXPORT_COLUMN_TYPES.get(column, 'string')))
+                        for column in columns])
+    rows = 0
+    with pq.ParquetWriter(filename, schema, compression=compression) as writer:
+        for chunk in chunks:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+# Callback a source hands each batch of parsed startups to as soon as it has them
+BatchHandler = Callable[[List[StartupData]], Awaitable[None]]
+# Receives a source query's new watermark: (source, query, watermark)
+WatermarkHandler = Callable[[str, str, str], None]
+
+class DataSource:
+    """Base class for startup data source plugins
+
+    Subclasses are registered under a ``data_sources`` key with
+    ``register_source`` and stream their results through ``emit`` so that
+    anything emitted before a timeout is kept. New watermarks go to
+    ``advance_watermark``, which only holds them: they are stored once the
+    source has finished and everything it emitted has been written.
+    """
+    
+    def __init__(self, tracker: 'StartupTracker', config: Dict, full_resync: bool = False):
+        self.tracker = tracker
+        self.config = config
+        self.full_resync = full_resync  # ignore stored watermarks and fetch everything
+        self.watermarks: Dict[Tuple[str, str], str] = {}
+    
+    async def collect(self, session: CachedSession, emit: BatchHandler):
+        raise NotImplementedError
+    
+    def advance_watermark(self, source: str, query: str, watermark: str):
+        self.watermarks[(source, query)] = watermark
+
+SOURCE_REGISTRY: Dict[str, Type[DataSource]] = {}
+
+def register_source(name: str):
+    """Class decorator registering a ``DataSource`` under a ``data_sources`` key"""
+    def decorator(cls: Type[DataSource]) -> Type[DataSource]:
+        SOURCE_REGISTRY[name] = cls
+        return cls
+    return decorator
+
+@register_source('github_trending')
+class GitHubTrendingSource(DataSource):
+    """Trending GitHub repositories with commercial potential"""
+    
+    async def collect(self, session: CachedSession, emit: BatchHandler):
+        await self.tracker.fetch_github_trending(session, on_batch=emit, full_resync=self.full_resync,
+                                                 on_watermark=self.advance_watermark)
+
+@register_source('crunchbase')
+class CrunchbaseSource(DataSource):
+    """Recently created organizations from the Crunchbase search API"""
+    
+    async def collect(self, session: CachedSession, emit: BatchHandler):
+        api_key = os.environ.get('CRUNCHBASE_API_KEY')
+        if not api_key:
+            # The collector falls back to demo data without a key; keep that out of the database
+            logger.info("CRUNCHBASE_API_KEY not set; skipping Crunchbase")
+            return
+        
+        # Imported lazily because implement_enhancements pulls in Streamlit
+        from implement_enhancements import CrunchbaseCollector
+        
+        collector = CrunchbaseCollector(api_key, rate_limiter=self.tracker.rate_limiter,
+                                        response_cache=self.tracker.response_cache,
+                                        base_url=self.tracker.crunchbase_api)
+        since = None if self.full_resync else self.tracker.get_watermark('crunchbase', 'organizations')
+        organizations = await collector.collect_recent_startups(self.config.get('limit', 100), session=session,
+                                                                updated_since=since)
+        today = datetime.now().isoformat()[:10]
+        
+        await emit([
+            StartupData(
+                name=org.name,
+                industry=self.tracker._classify_industry(f"{org.description} {org.market_sector}"),
+                founded_date=None,
+                revenue_estimate=None,
+                growth_rate=None,
+                funding_raised=org.last_funding_amount,
+                employee_count=org.employee_count,
+                revenue_model=org.revenue_model,
+                last_updated=today,
+                source='Crunchbase',
+                stage=org.funding_stage,
+                location='Unknown',
+                external_id=org.external_id,
+                homepage=org.website_url,
+                description=org.description
+            )
+            for org in organizations
+        ])
+        
+        cursor = max((org.updated_at for org in organizations if org.updated_at), default=None)
+        if cursor:
+            self.advance_watermark('crunchbase', 'organizations', cursor)
+
+@register_source('product_hunt')
+class ProductHuntSource(DataSource):
+    """Launches from the Product Hunt GraphQL API posted since the last run
+
+    Posts only come newest first, so every page since the watermark is
+    fetched through the cursor and the watermark advances only once the last
+    page has been reached; otherwise posts older than the fetched pages
+    would be skipped for good.
+    """
+    
+    QUERY = '''
+    query RecentPosts($first: Int!, $after: String, $postedAfter: DateTime) {
+      posts(order: NEWEST, first: $first, after: $after, postedAfter: $postedAfter) {
+        pageInfo { hasNextPage endCursor }
+        edges { node { id name tagline createdAt website topics { edges { node { name } } } } }
+      }
+    }
+    '''
+    
+    async def collect(self, session: CachedSession, emit: BatchHandler):
+        token = os.environ.get('PRODUCT_HUNT_TOKEN')
+        if not token:
+            logger.info("PRODUCT_HUNT_TOKEN not set; skipping Product Hunt")
+            return
+        
+        since = None if self.full_resync else self.tracker.get_watermark('product_hunt', 'posts')
+        today = datetime.now().isoformat()[:10]
+        latest = since or ''
+        cursor = None
+        for _ in range(self.config.get('max_pages', 20)):
+            status, data = await session.request_json(
+                'product_hunt', 'POST', self.tracker.product_hunt_api,
+                headers={'Authorization': f"Bearer {token}"},
+                json_body={'query': self.QUERY,
+                           'variables': {'first': self.config.get('limit', 50), 'after': cursor,
+                                         'postedAfter': since}}
+            )
+            if status != 200 or not data:
+                logger.error(f"Product Hunt API error: {status}")
+                return
+            
+            posts = (data.get('data') or {}).get('posts') or {}
+            startups = []
+            for edge in posts.get('edges', []):
+                post = edge['node']
+                topics = ' '.join(topic['node']['name'] for topic in post.get('topics', {}).get('edges', []))
+                startups.append(StartupData(
+                    name=post['name'],
+                    industry=self.tracker._classify_industry(f"{post.get('tagline') or ''} {topics}"),
+                    founded_date=post['createdAt'][:10],
+                    revenue_estimate=None,
+                    growth_rate=None,
+                    funding_raised=None,
+                    employee_count=None,
+                    revenue_model='Unknown',
+                    last_updated=today,
+                    source='Product Hunt',
+                    stage='Early',
+                    location='Unknown',
+                    external_id=post.get('id'),
+                    homepage=post.get('website'),
+                    description=post.get('tagline')
+                ))
+                latest = max(latest, post['createdAt'])
+            await emit(startups)
+            
+            page_info = posts.get('pageInfo') or {}
+            cursor = page_info.get('endCursor')
+            if not page_info.get('hasNextPage') or not cursor:
+                break
+        else:
+            if since:
+                # Older posts since the watermark are still unfetched; the next run starts over from it
+                logger.warning(f"Product Hunt has more than {self.config.get('max_pages', 20)} pages of posts "
+                               f"since {since}; keeping the watermark")
+                return
+        
+        if latest:
+            self.advance_watermark('product_hunt', 'posts', latest)
 
 class StartupTracker:
     """Main class for tracking and analyzing startup data"""
     
-    def __init__(self, db_path: str = "startup_data.db"):
+    def __init__(self, db_path: str = "startup_data.db", rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[ResponseCache] = None, github_api: Optional[str] = None,
+                 crunchbase_api: Optional[str] = None, product_hunt_api: Optional[str] = None):
         self.db_path = db_path
+        self.db = get_connection_manager(db_path)
+        self.lookup_ids: Dict[str, Dict[str, int]] = {}  # lookup column -> value -> id, filled as rows are saved
+        self.min_hasher = MinHasher()
         self.setup_database()
         
-        # API endpoints and configurations
-        self.crunchbase_api = "https://api.crunchbase.com/api/v4"
-        self.github_api = "https://api.github.com"
+        # API endpoints and configurations; overridable to point at fake_api_server.py
+        self.crunchbase_api = crunchbase_api or os.environ.get('CRUNCHBASE_API_URL', "https://api.crunchbase.com/api/v4")
+        self.github_api = github_api or os.environ.get('GITHUB_API_URL', "https://api.github.com")
+        self.product_hunt_api = product_hunt_api or os.environ.get(
+            'PRODUCT_HUNT_API_URL', "https://api.producthunt.com/v2/api/graphql"
+        )
         
         # Data sources configuration
         self.data_sources = {
             'crunchbase': {
                 'enabled': True,
                 'rate_limit': 200,  # requests per hour
-                'priority': 1
+                'priority': 1,
+                'timeout': 30,  # seconds before partial results are returned
+                'limit': 100
             },
             'github_trending': {
                 'enabled': True,
                 'rate_limit': 5000,  # requests per hour
-                'priority': 2
+                'priority': 2,
+                'timeout': 120,
+                'query': 'stars:>100',
+                'created_since': '2023-01-01',  # start of the sharded created: range
+                'per_page': 100,  # GitHub maximum
+                'max_pages': 10,  # per shard; search results are capped at 1,000 items
+                'concurrency': 5,  # simultaneous page requests
+                # Weighted indicators a repository must reach to count as a potential startup.
+                # Weights other than stars/forks/has_wiki/homepage are description keywords.
+                'startup_filter': {
+                    'weights': {
+                        'saas': 1.0, 'startup': 1.0, 'business': 1.0, 'platform': 1.0,
+                        'stars': 1.0, 'forks': 1.0, 'has_wiki': 1.0, 'homepage': 1.0
+                    },
+                    'min_stars': 500,
+                    'min_forks': 50,
+                    'threshold': 3.0
+                }
             },
             'product_hunt': {
                 'enabled': True,
                 'rate_limit': 1000,
-                'priority': 3
+                'priority': 3,
+                'timeout': 30,
+                'limit': 50,  # posts per page
+                'max_pages': 20  # per run; the watermark only advances once every page since it is fetched
             }
         }
         
+        # One token bucket per source, shared with every other collector in the process
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        for source, config in self.data_sources.items():
+            self.rate_limiter.configure(source, config['rate_limit'])
+        
+        # Conditional-request cache; 304 revalidations cost no API budget
+        self.response_cache = response_cache or get_response_cache()
+        
+        # Streaming ingestion: sources -> bounded queue -> single SQLite writer
+        self.ingest_config = {
+            'queue_size': 20,  # batches in flight before sources block
+            'batch_size': 500,  # startups per write transaction
+            'flush_interval': 2.0  # seconds before a partial batch is written anyway
+        }
+        
+        self.industry_classifier = IndustryClassifier()
+        
+        # Rows, bytes and throughput of the most recent export_data call
+        self.last_export_stats: Optional[Dict] = None
+        
         # Industry categories for classification
         self.industries = [
             'SaaS', 'AI/ML', 'FinTech', 'HealthTech', 'EdTech', 'PropTech',
@@ -77,111 +543,227 @@ class StartupTracker:
         ]
     
     def setup_database(self):
-        """Initialize SQLite database for storing startup data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS startups (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            industry TEXT,
-            founded_date TEXT,
-            revenue_estimate REAL,
-            growth_rate REAL,
-            funding_raised REAL,
-            employee_count INTEGER,
-            revenue_model TEXT,
-            last_updated TEXT,
-            source TEXT,
-            stage TEXT,
-            location TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS revenue_tracking (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            startup_id INTEGER,
-            revenue_period TEXT,
-            revenue_amount REAL,
-            metric_type TEXT,
-            data_date TEXT,
-            confidence_score REAL,
-            FOREIGN KEY (startup_id) REFERENCES startups (id)
-        )
-        ''')
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS market_analysis (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            industry TEXT,
-            market_size REAL,
-            growth_rate REAL,
-            avg_first_year_revenue REAL,
-            success_rate REAL,
-            analysis_date TEXT
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        logger.info("Database initialized successfully")
+        """Initialize SQLite database for storing startup data, upgrading its schema if needed"""
+        # Tables, indexes and data backfills are versioned migrations; see migrations.py
+        version = migrate(self.db)
+        logger.info(f"Database initialized successfully (schema version {version})")
+    
+    def get_watermark(self, source: str, query: str) -> Optional[str]:
+        """High-water mark stored for a source query, or None before its first full run"""
+        with self.db.reader() as conn:
+            row = conn.execute(WATERMARK_QUERY, (source, query)).fetchone()
+        return row[0] if row else None
     
-    async def fetch_github_trending(self, session: aiohttp.ClientSession) -> List[Dict]:
-        """Fetch trending repositories that could be potential startups"""
+    def set_watermark(self, source: str, query: str, watermark: str):
+        """Record how far a source query has been collected"""
+        self.set_watermarks({(source, query): watermark})
+    
+    def set_watermarks(self, watermarks: Dict[Tuple[str, str], str]):
+        """Record several ``(source, query)`` watermarks in one transaction"""
+        updated_at = datetime.now().isoformat()
+        with self.db.writer() as conn:
+            conn.executemany('''
+            INSERT INTO source_state (source, query, watermark, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(source, query) DO UPDATE SET watermark = excluded.watermark, updated_at = excluded.updated_at
+            ''', [(source, query, watermark, updated_at) for (source, query), watermark in watermarks.items()])
+    
+    async def fetch_github_trending(self, session: CachedSession,
+                                    on_batch: Optional[BatchHandler] = None,
+                                    full_resync: bool = False,
+                                    on_watermark: Optional[WatermarkHandler] = None) -> StartupBatch:
+        """Fetch trending repositories that could be potential startups
+
+        The search is split into ``created:`` date shards small enough to stay
+        under GitHub's result cap (see ``GitHubQueryPlanner``), and every shard's
+        pages are fetched concurrently, bounded by the ``concurrency`` setting.
+        Each page's startups are handed to ``on_batch`` as soon as they are
+        parsed, if given; otherwise they are collected and returned.
+
+        Unless ``full_resync`` is set, only repositories pushed after the
+        stored ``pushed_at`` watermark are requested; the watermark advances
+        once every page of the sweep has been fetched, through ``on_watermark``
+        if given (so the caller can store it after saving the startups).
+        """
+        config = self.data_sources['github_trending']
+        url = f"{self.github_api}/search/repositories"
+        semaphore = asyncio.Semaphore(config['concurrency'])
+        base_query = config['query']
+        start = date.fromisoformat(config['created_since'])
+        
+        since = None if full_resync else self.get_watermark('github_trending', base_query)
+        query = f"{base_query} pushed:>{since}" if since else base_query
+        
+        async def probe(query: str) -> Optional[int]:
+            total_count, _ = await self._fetch_github_page(session, url, query, 1, semaphore, per_page=1)
+            return total_count
+        
         try:
-            # Get trending repositories
-            url = f"{self.github_api}/search/repositories"
-            params = {
-                'q': 'stars:>100 created:>2023-01-01',
-                'sort': 'stars',
-                'order': 'desc',
-                'per_page': 50
-            }
+            planner = GitHubQueryPlanner(self.db, probe)
+            # Delta queries change every run, so only full sweeps are worth remembering
+            shards = await planner.plan(query, start, date.today(), remember=since is None)
             
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    startups = []
-                    for repo in data.get('items', []):
-                        # Look for commercial potential indicators
-                        if self._is_potential_startup(repo):
-                            startup_data = self._extract_github_startup_data(repo)
-                            startups.append(startup_data)
-                    
-                    logger.info(f"Found {len(startups)} potential startups on GitHub")
-                    return startups
-                else:
-                    logger.error(f"GitHub API error: {response.status}")
-                    return []
+            results = await asyncio.gather(*[
+                self._fetch_github_shard(session, url, planner, query, shard, semaphore, on_batch)
+                for shard in shards
+            ])
+            # Re-splits during the fetch probe too, so failures are checked once every shard is done
+            sweep = GitHubSweepResult(complete=not planner.failed_ranges)
+            for result in results:
+                sweep.merge(result)
+            
+            # Shards with a gap would be discarded by load_shards anyway
+            if since is None and sweep.shards and sweep.complete:
+                planner.save_shards(query, sweep.shards)
+            if sweep.complete and sweep.latest_pushed_at:
+                (on_watermark or self.set_watermark)('github_trending', base_query, sweep.latest_pushed_at)
+            
+            logger.info(f"Found {sweep.found} potential startups on GitHub across "
+                        f"{len(sweep.shards)} shards ({'since ' + since if since else 'full sweep'})")
+            return sweep.startups
                     
         except Exception as e:
             logger.error(f"Error fetching GitHub data: {e}")
-            return []
+            return StartupBatch()
+    
+    async def _fetch_github_shard(self, session: CachedSession, url: str, planner: GitHubQueryPlanner,
+                                  base_query: str, shard: Tuple[date, date, int], semaphore: asyncio.Semaphore,
+                                  on_batch: Optional[BatchHandler] = None) -> GitHubSweepResult:
+        """Fetch every page of one date shard, re-splitting it if it has outgrown the cap"""
+        config = self.data_sources['github_trending']
+        shard_start, shard_end, _ = shard
+        query = planner.shard_query(base_query, shard_start, shard_end)
+        
+        total_count, items = await self._fetch_github_page(session, url, query, 1, semaphore)
+        if total_count is None:
+            return GitHubSweepResult(complete=False)
+        
+        if total_count > GITHUB_SEARCH_RESULT_CAP and shard_start < shard_end:
+            # Stars accumulate over time, so a remembered shard can grow past the cap
+            failures = len(planner.failed_ranges)
+            sub_shards = await planner.split(base_query, shard_start, shard_end, total_count)
+            results = await asyncio.gather(*[
+                self._fetch_github_shard(session, url, planner, base_query, sub_shard, semaphore, on_batch)
+                for sub_shard in sub_shards
+            ])
+            # A failed probe leaves part of this shard unfetched
+            sweep = GitHubSweepResult(complete=len(planner.failed_ranges) == failures)
+            for result in results:
+                sweep.merge(result)
+            return sweep
+        
+        sweep = GitHubSweepResult(shards=[(shard_start, shard_end, total_count)])
+        available = min(total_count, GITHUB_SEARCH_RESULT_CAP)
+        last_page = min(config['max_pages'], -(-available // config['per_page']))
+        pages = [(total_count, items)] + await asyncio.gather(*[
+            self._fetch_github_page(session, url, query, page, semaphore)
+            for page in range(2, last_page + 1)
+        ])
+        
+        for page_total, page_items in pages:
+            sweep.complete = sweep.complete and page_total is not None
+            sweep.latest_pushed_at = max([sweep.latest_pushed_at] + [repo.get('pushed_at') or '' for repo in page_items])
+            startups = await self._parse_github_items(page_items, on_batch)
+            sweep.found += len(startups)
+            if on_batch is None:
+                sweep.startups.extend(startups)
+        
+        return sweep
+    
+    async def _fetch_github_page(self, session: CachedSession, url: str, query: str, page: int,
+                                 semaphore: asyncio.Semaphore, per_page: Optional[int] = None
+                                 ) -> Tuple[Optional[int], List[Dict]]:
+        """Fetch one page of GitHub search results
+
+        Returns the reported ``total_count`` (None on error) and the raw repository items.
+        """
+        params = {
+            'q': query,
+            'sort': 'stars',
+            'order': 'desc',
+            'per_page': per_page or self.data_sources['github_trending']['per_page'],
+            'page': page
+        }
+        try:
+            async with semaphore:
+                status, data = await session.get_json('github_trending', url, params=params)
+            if status != 200:
+                logger.error(f"GitHub API error on page {page} of '{query}': {status}")
+                return None, []
+        except Exception as e:
+            logger.error(f"Error fetching page {page} of '{query}': {e}")
+            return None, []
+        
+        return data.get('total_count', 0), data.get('items', [])
+    
+    async def _parse_github_items(self, items: List[Dict],
+                                  on_batch: Optional[BatchHandler] = None
+                                  ) -> List[StartupData]:
+        """Turn search items into startups and pass them on to ``on_batch``"""
+        # Look for commercial potential indicators
+        mask = self.filter_potential_startups(items)
+        candidates = [repo for repo, keep in zip(items, mask) if keep]
+        classified = self.industry_classifier.classify_many(
+            self._github_classification_text(repo) for repo in candidates
+        )
+        startups = [
+            self._extract_github_startup_data(repo, industry)
+            for repo, (industry, _) in zip(candidates, classified)
+        ]
+        if on_batch and startups:
+            await on_batch(startups)
+        return startups
     
     def _is_potential_startup(self, repo: Dict) -> bool:
         """Determine if a GitHub repo represents a potential startup"""
-        indicators = [
-            'saas' in repo['description'].lower() if repo.get('description') else False,
-            'startup' in repo['description'].lower() if repo.get('description') else False,
-            'business' in repo['description'].lower() if repo.get('description') else False,
-            'platform' in repo['description'].lower() if repo.get('description') else False,
-            repo.get('stargazers_count', 0) > 500,
-            repo.get('forks_count', 0) > 50,
-            repo.get('has_wiki', False),
-            bool(repo.get('homepage')),
-        ]
+        return bool(self.filter_potential_startups([repo])[0])
+    
+    def filter_potential_startups(self, items: List[Dict]) -> np.ndarray:
+        """Boolean mask of the search items that look like potential startups
+
+        One pass over the items packs every indicator into arrays; the
+        weighted indicator sum is then computed with vector operations and
+        compared against the configured threshold.
+        """
+        config = self.data_sources['github_trending']['startup_filter']
+        weights = config['weights']
+        keywords = [name for name in weights if name not in REPO_INDICATORS]
+        count = len(items)
+        
+        descriptions = []
+        stars = np.empty(count, dtype=np.int64)
+        forks = np.empty(count, dtype=np.int64)
+        has_wiki = np.empty(count, dtype=bool)
+        homepage = np.empty(count, dtype=bool)
+        for i, repo in enumerate(items):
+            descriptions.append((repo.get('description') or '').lower())
+            stars[i] = repo.get('stargazers_count') or 0
+            forks[i] = repo.get('forks_count') or 0
+            has_wiki[i] = bool(repo.get('has_wiki'))
+            homepage[i] = bool(repo.get('homepage'))
+        
+        score = (
+            (stars > config['min_stars']) * weights.get('stars', 0.0)
+            + (forks > config['min_forks']) * weights.get('forks', 0.0)
+            + has_wiki * weights.get('has_wiki', 0.0)
+            + homepage * weights.get('homepage', 0.0)
+        )
+        if keywords and count:
+            description_array = np.array(descriptions, dtype=str)
+            keyword_hits = np.column_stack([np.char.find(description_array, keyword) >= 0 for keyword in keywords])
+            score = score + keyword_hits @ np.array([weights[keyword] for keyword in keywords])
         
-        return sum(indicators) >= 3
+        return score >= config['threshold']
+    
+    @staticmethod
+    def _github_classification_text(repo: Dict) -> str:
+        """Description and topics of a repository, as one string for the classifier"""
+        return f"{repo.get('description') or ''} {' '.join(repo.get('topics') or [])}"
     
-    def _extract_github_startup_data(self, repo: Dict) -> StartupData:
+    def _extract_github_startup_data(self, repo: Dict, industry: Optional[str] = None) -> StartupData:
         """Extract startup data from GitHub repository"""
         return StartupData(
             name=repo['name'],
-            industry=self._classify_industry(repo.get('description', '') + ' ' + repo.get('topics', [])),
+            industry=industry or self._classify_industry(self._github_classification_text(repo)),
             founded_date=repo['created_at'][:10],
             revenue_estimate=None,  # Not available from GitHub
             growth_rate=None,
@@ -191,209 +773,416 @@ class StartupTracker:
             last_updated=datetime.now().isoformat()[:10],
             source='GitHub',
             stage='Early',
-            location='Unknown'
+            location='Unknown',
+            external_id=str(repo['id']) if repo.get('id') is not None else None,
+            homepage=repo.get('homepage'),
+            description=repo.get('description')
         )
     
     def _classify_industry(self, text: str) -> str:
         """Classify startup industry based on description and keywords"""
-        text_lower = text.lower()
-        
-        # Industry keyword mapping
-        industry_keywords = {
-            'SaaS': ['saas', 'software as a service', 'cloud software'],
-            'AI/ML': ['ai', 'artificial intelligence', 'machine learning', 'ml', 'deep learning', 'neural network'],
-            'FinTech': ['fintech', 'financial', 'banking', 'payment', 'crypto', 'blockchain'],
-            'HealthTech': ['health', 'medical', 'healthcare', 'telemedicine', 'wellness'],
-            'EdTech': ['education', 'learning', 'teaching', 'school', 'university'],
-            'Developer Tools': ['developer', 'programming', 'coding', 'api', 'devops', 'ci/cd'],
-            'E-commerce': ['ecommerce', 'e-commerce', 'retail', 'shopping', 'marketplace'],
-            'Marketing Tech': ['marketing', 'advertising', 'social media', 'analytics', 'seo'],
-            'Cybersecurity': ['security', 'cybersecurity', 'encryption', 'privacy', 'firewall'],
-            'ClimaTech': ['climate', 'sustainability', 'green', 'environment', 'carbon'],
-        }
-        
-        for industry, keywords in industry_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return industry
-        
-        return 'Other'
+        return self.industry_classifier.classify(text)[0]
     
-    async def collect_startup_data(self) -> List[StartupData]:
-        """Collect startup data from all configured sources"""
-        all_startups = []
+    async def collect_startup_data(self, full_resync: bool = False) -> StartupBatch:
+        """Collect startup data from all configured sources
+
+        Nothing is saved, so source watermarks stay where they are.
+        """
+        all_startups = StartupBatch()
         
-        async with aiohttp.ClientSession() as session:
-            # GitHub trending repositories
-            github_startups = await self.fetch_github_trending(session)
-            all_startups.extend(github_startups)
-            
-            # Add more data sources here as needed
-            # crunchbase_startups = await self.fetch_crunchbase_data(session)
-            # product_hunt_startups = await self.fetch_product_hunt_data(session)
+        async def collect(batch: List[StartupData]):
+            all_startups.extend(batch)
+            logger.debug(f"Received {len(batch)} startups ({len(all_startups)} so far)")
         
+        await self.run_sources(collect, full_resync)
         logger.info(f"Collected data for {len(all_startups)} startups")
         return all_startups
     
-    def save_startup_data(self, startups: List[StartupData]):
-        """Save startup data to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    async def ingest_startup_data(self, full_resync: bool = False) -> int:
+        """Stream startups from every source into the database as they arrive
+
+        Sources push batches into a bounded queue, which blocks them while the
+        writer falls behind; a single writer drains it in batched transactions.
+        Sources fetch only what changed since their watermark unless
+        ``full_resync`` is set. The finished sources' watermarks are stored
+        only once the writer has drained without a failed batch, so startups
+        lost to a failed write or a crash are fetched again by the next run.
+        Returns the number of startups written.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.ingest_config['queue_size'])
+        writer = asyncio.create_task(self._write_queued_startups(queue))
+        watermarks: Dict[Tuple[str, str], str] = {}
+        
+        try:
+            await self.run_sources(queue.put, full_resync, watermarks)
+        finally:
+            await queue.put(None)  # tell the writer no more batches are coming
+            saved, failed = await writer
+        
+        if failed:
+            logger.warning(f"{failed} startups could not be written; keeping source watermarks so the next run "
+                           f"fetches them again")
+        elif watermarks:
+            self.set_watermarks(watermarks)
+        logger.info(f"Ingested {saved} startups")
+        await asyncio.to_thread(self.index_source_records)
+        return saved
+    
+    async def _write_queued_startups(self, queue: asyncio.Queue) -> Tuple[int, int]:
+        """Drain the ingestion queue into SQLite, one transaction per batch
+
+        Returns the number of startups written and the number in failed batches.
+        """
+        batch_size = self.ingest_config['batch_size']
+        pending = StartupBatch()
+        saved = failed = 0
         
-        for startup in startups:
+        async def flush():
+            nonlocal pending, saved, failed
+            batch, pending = pending, StartupBatch()
             try:
-                cursor.execute('''
-                INSERT OR REPLACE INTO startups 
-                (name, industry, founded_date, revenue_estimate, growth_rate, 
-                 funding_raised, employee_count, revenue_model, last_updated, 
-                 source, stage, location)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    startup.name,
-                    startup.industry,
-                    startup.founded_date,
-                    startup.revenue_estimate,
-                    startup.growth_rate,
-                    startup.funding_raised,
-                    startup.employee_count,
-                    startup.revenue_model,
-                    startup.last_updated,
-                    startup.source,
-                    startup.stage,
-                    startup.location
-                ))
+                await asyncio.to_thread(self.save_startup_data, batch)
+                saved += len(batch)
             except Exception as e:
-                logger.error(f"Error saving startup {startup.name}: {e}")
+                failed += len(batch)
+                logger.error(f"Error writing batch of {len(batch)} startups: {e}")
+        
+        while True:
+            try:
+                batch = await asyncio.wait_for(queue.get(), self.ingest_config['flush_interval'])
+            except asyncio.TimeoutError:
+                if pending:
+                    await flush()
+                continue
+            
+            if batch is None:
+                break
+            pending.extend(batch)
+            if len(pending) >= batch_size:
+                await flush()
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Saved {len(startups)} startups to database")
+        if pending:
+            await flush()
+        return saved, failed
     
-    def analyze_industry_trends(self) -> Dict:
-        """Analyze trends across industries"""
-        conn = sqlite3.connect(self.db_path)
-        
-        # Get industry distribution
-        industry_query = '''
-        SELECT industry, COUNT(*) as count, 
-               AVG(revenue_estimate) as avg_revenue,
-               AVG(growth_rate) as avg_growth
-        FROM startups 
-        WHERE industry IS NOT NULL
-        GROUP BY industry
-        ORDER BY count DESC
-        '''
+    async def run_sources(self, emit: BatchHandler, full_resync: bool = False,
+                          watermarks: Optional[Dict[Tuple[str, str], str]] = None) -> Dict[str, int]:
+        """Run every enabled source concurrently over one shared session
+
+        Each source runs under its own ``timeout``; batches it emitted before
+        the deadline are kept, but only sources that finish add their new
+        watermarks to ``watermarks``, for the caller to store once the batches
+        are saved. Returns the number of startups per source.
+        """
+        enabled = sorted(
+            (config['priority'], name) for name, config in self.data_sources.items() if config['enabled']
+        )
+        sources = []
+        for _, name in enabled:
+            if name not in SOURCE_REGISTRY:
+                logger.warning(f"No collector registered for data source '{name}'")
+                continue
+            sources.append((name, SOURCE_REGISTRY[name](self, self.data_sources[name], full_resync)))
         
-        industry_data = pd.read_sql_query(industry_query, conn)
-        
-        # Get funding trends
-        funding_query = '''
-        SELECT industry, 
-               AVG(funding_raised) as avg_funding,
-               COUNT(*) as startup_count
-        FROM startups 
-        WHERE funding_raised IS NOT NULL
-        GROUP BY industry
-        ORDER BY avg_funding DESC
-        '''
+        async with CachedSession(self.response_cache, self.rate_limiter) as session:
+            results = await asyncio.gather(*[
+                self._run_source(name, source, session, emit) for name, source in sources
+            ])
         
-        funding_data = pd.read_sql_query(funding_query, conn)
+        if watermarks is not None:
+            for (_, source), (_, finished) in zip(sources, results):
+                if finished:
+                    watermarks.update(source.watermarks)
+        self.rate_limiter.save()
+        return {name: received for (name, _), (received, _) in zip(sources, results)}
+    
+    async def _run_source(self, name: str, source: DataSource, session: CachedSession,
+                          emit: BatchHandler) -> Tuple[int, bool]:
+        """Run one source under its deadline, returning how many startups it emitted and whether it finished"""
+        received = 0
         
-        conn.close()
+        async def counting_emit(batch: List[StartupData]):
+            nonlocal received
+            received += len(batch)
+            await emit(batch)
         
-        return {
-            'industry_distribution': industry_data.to_dict('records'),
-            'funding_trends': funding_data.to_dict('records'),
-            'total_startups': len(industry_data),
-            'analysis_date': datetime.now().isoformat()[:10]
-        }
+        timeout = self.data_sources[name].get('timeout')
+        try:
+            await asyncio.wait_for(source.collect(session, counting_emit), timeout)
+            logger.info(f"{name}: collected {received} startups")
+            return received, True
+        except asyncio.TimeoutError:
+            logger.warning(f"{name}: timed out after {timeout}s; keeping {received} partial results")
+        except Exception as e:
+            logger.error(f"{name}: collection failed after {received} startups: {e}")
+        return received, False
     
-    def generate_revenue_insights(self) -> Dict:
-        """Generate insights about revenue patterns"""
-        conn = sqlite3.connect(self.db_path)
-        
-        # Revenue by stage analysis
-        stage_revenue_query = '''
-        SELECT stage, 
-               COUNT(*) as count,
-               AVG(revenue_estimate) as avg_revenue,
-               MIN(revenue_estimate) as min_revenue,
-               MAX(revenue_estimate) as max_revenue
-        FROM startups 
-        WHERE revenue_estimate IS NOT NULL
-        GROUP BY stage
-        '''
+    def save_startup_data(self, startups: Union[StartupBatch, Iterable[StartupData]]) -> Dict[str, int]:
+        """Upsert startup data in a single transaction
+
+        Each startup is resolved to an entity (see entity_resolution.py) and
+        upserted on its entity key, so startups sharing a name stay apart and
+        one company seen by several sources shares a row, owned by the source
+        that created it; the others only fill in values it lacks. Existing rows
+        are updated in place, so their ``id`` (and any ``revenue_tracking``
+        rows pointing at it) survives a refresh; rows whose data has not
+        changed are not written at all. Returns the number of inserted, updated and
+        unchanged startups.
+        """
+        startups = StartupBatch.of(startups)
+        rows = startups.rows(STARTUP_COLUMNS)
         
-        stage_data = pd.read_sql_query(stage_revenue_query, conn)
-        
-        # Growth rate analysis
-        growth_query = '''
-        SELECT industry,
-               AVG(growth_rate) as avg_growth_rate,
-               COUNT(*) as sample_size
-        FROM startups
-        WHERE growth_rate IS NOT NULL
-        GROUP BY industry
-        ORDER BY avg_growth_rate DESC
+        stored = [stored_column(column) for column in STARTUP_COLUMNS]
+        # last_updated is refreshed on every collection, so it does not count as a change
+        compared = [stored_column(column) for column in STARTUP_COLUMNS if column != 'last_updated']
+        # The source that created a row owns it; other sources resolved to the same entity only fill gaps
+        owner = "startups_data.source_id IS excluded.source_id"
+        values = {column: f"CASE WHEN {owner} THEN COALESCE(excluded.{column}, startups_data.{column}) "
+                          f"ELSE COALESCE(startups_data.{column}, excluded.{column}) END" for column in stored}
+        values.update(name=f"CASE WHEN {owner} THEN excluded.name ELSE startups_data.name END",
+                      source_id="startups_data.source_id", last_updated_day="excluded.last_updated_day")
+        # Rows are staged and upserted in one statement: executed per row, the statement
+        # pays for the startups_data triggers on every execution even when they are skipped
+        stage = f"CREATE TEMP TABLE IF NOT EXISTS startup_batch ({', '.join(stored)}, entity_key)"
+        upsert = f'''
+        INSERT INTO startups_data ({', '.join(stored)}, entity_key)
+        SELECT {', '.join(stored)}, entity_key FROM temp.startup_batch WHERE true ORDER BY rowid
+        ON CONFLICT(entity_key) DO UPDATE SET
+            {', '.join(f"{column} = {values[column]}" for column in stored)}
+        WHERE ({', '.join(f"startups_data.{column}" for column in compared)})
+           IS NOT ({', '.join(values[column] for column in compared)})
         '''
         
-        growth_data = pd.read_sql_query(growth_query, conn)
+        try:
+            with self.db.writer() as conn:
+                records = list(startups)  # entity resolution reads them record by record
+                entity_keys = resolve_entities(conn, records)
+                rows = normalize_rows(conn, STARTUP_COLUMNS, rows, self.lookup_ids)
+                last_id = conn.execute(MAX_STARTUP_ID_QUERY).fetchone()[0]
+                conn.execute(stage)
+                conn.execute("DELETE FROM temp.startup_batch")
+                conn.executemany(f"INSERT INTO temp.startup_batch VALUES ({', '.join('?' * (len(stored) + 1))})",
+                                 [row + (key,) for row, key in zip(rows, entity_keys)])
+                with batched_rollups(conn, entity_keys):
+                    written = conn.execute(upsert).rowcount
+                # AUTOINCREMENT ids only grow, so new rows are exactly those past the old maximum
+                inserted = conn.execute(STARTUPS_AFTER_ID_QUERY, (last_id,)).fetchone()[0]
+                record_sources(conn, records, entity_keys, self.min_hasher)
+        except sqlite3.Error as e:
+            logger.error(f"Error saving batch of {len(startups)} startups: {e}")
+            self.lookup_ids.clear()  # lookup rows added in the rolled-back transaction are gone
+            raise
+        
+        counts = {'inserted': inserted, 'updated': written - inserted, 'unchanged': len(rows) - written}
+        logger.info(f"Saved {len(startups)} startups to database "
+                    f"({counts['inserted']} new, {counts['updated']} updated, {counts['unchanged']} unchanged)")
+        return counts
+    
+    def compute_analytics(self) -> Dict:
+        """Compute every industry and stage statistic from a single read of the rollups
+
+        Returns ``{'industry_trends': ..., 'revenue_insights': ...}`` in the
+        shapes of ``analyze_industry_trends`` and ``generate_revenue_insights``.
+        """
+        with self.db.reader() as conn:
+            rollups = pd.read_sql_query(ROLLUPS_QUERY, conn)
+        
+        sums = ['startup_count', 'revenue_count', 'revenue_sum', 'growth_count', 'growth_sum',
+                'funding_count', 'funding_sum']
+        by_industry = self._by_group(rollups.groupby('industry', dropna=False)[sums].sum(), 'industry')
+        by_stage = self._by_group(rollups.groupby('stage', dropna=False).agg(
+            revenue_count=('revenue_count', 'sum'),
+            revenue_sum=('revenue_sum', 'sum'),
+            revenue_min=('revenue_min', 'min'),
+            revenue_max=('revenue_max', 'max')
+        ), 'stage')
+        
+        # Each statistic averages only the rows where its column is known, as AVG() does
+        def mean(frame: pd.DataFrame, column: str) -> pd.Series:
+            return frame[f"{column}_sum"] / frame[f"{column}_count"].where(frame[f"{column}_count"] > 0)
+        
+        industry_data = by_industry[by_industry['industry'].notna()].assign(
+            count=lambda f: f['startup_count'],
+            avg_revenue=lambda f: mean(f, 'revenue'),
+            avg_growth=lambda f: mean(f, 'growth')
+        ).sort_values('count', ascending=False, kind='stable')[['industry', 'count', 'avg_revenue', 'avg_growth']]
         
-        conn.close()
+        funding_data = by_industry[by_industry['funding_count'] > 0].assign(
+            avg_funding=lambda f: mean(f, 'funding'),
+            startup_count=lambda f: f['funding_count']
+        ).sort_values('avg_funding', ascending=False, kind='stable')[['industry', 'avg_funding', 'startup_count']]
         
+        stage_data = by_stage[by_stage['revenue_count'] > 0].assign(
+            count=lambda f: f['revenue_count'],
+            avg_revenue=lambda f: mean(f, 'revenue'),
+            min_revenue=lambda f: f['revenue_min'],
+            max_revenue=lambda f: f['revenue_max']
+        )[['stage', 'count', 'avg_revenue', 'min_revenue', 'max_revenue']]
+        
+        growth_data = by_industry[by_industry['growth_count'] > 0].assign(
+            avg_growth_rate=lambda f: mean(f, 'growth'),
+            sample_size=lambda f: f['growth_count']
+        ).sort_values('avg_growth_rate', ascending=False, kind='stable')[['industry', 'avg_growth_rate', 'sample_size']]
+        
+        today = datetime.now().isoformat()[:10]
         return {
-            'revenue_by_stage': stage_data.to_dict('records'),
-            'growth_by_industry': growth_data.to_dict('records'),
-            'insights_generated': datetime.now().isoformat()[:10]
+            'industry_trends': {
+                'industry_distribution': self._records(industry_data),
+                'funding_trends': self._records(funding_data),
+                'total_startups': len(industry_data),
+                'analysis_date': today
+            },
+            'revenue_insights': {
+                'revenue_by_stage': self._records(stage_data),
+                'growth_by_industry': self._records(growth_data),
+                'insights_generated': today
+            }
         }
     
-    def export_data(self, format: str = 'json') -> str:
-        """Export collected data in specified format"""
-        conn = sqlite3.connect(self.db_path)
+    @staticmethod
+    def _by_group(grouped: pd.DataFrame, key: str) -> pd.DataFrame:
+        """Turn a group index back into a column, with None (not NaN) for the unknown group"""
+        frame = grouped.reset_index()
+        frame[key] = frame[key].astype(object).where(frame[key].notna(), None)
+        return frame
+    
+    @staticmethod
+    def _records(frame: pd.DataFrame) -> List[Dict]:
+        """Rows as dicts, with None (not NaN) for an average over no known values, as AVG() gave NULL"""
+        return frame.astype(object).where(frame.notna(), None).to_dict('records')
+    
+    def analyze_industry_trends(self) -> Dict:
+        """Analyze trends across industries"""
+        return self.compute_analytics()['industry_trends']
+    
+    def generate_revenue_insights(self) -> Dict:
+        """Generate insights about revenue patterns"""
+        return self.compute_analytics()['revenue_insights']
+    
+    def verify_rollups(self) -> List[str]:
+        """Check the industry/stage rollups against a full recompute, logging any drift"""
+        with self.db.reader() as conn:
+            problems = verify_rollups(conn)
+        for problem in problems:
+            logger.warning(f"Rollup mismatch: {problem}")
+        return problems
+    
+    def rebuild_rollups(self):
+        """Recompute the industry/stage rollups from scratch"""
+        with self.db.writer() as conn:
+            rebuild_rollups(conn)
+    
+    def index_source_records(self) -> int:
+        """Add source records saved since the last call to the near-duplicate index, a chunk per transaction
+
+        Kept out of save_startup_data, whose throughput MinHash signatures
+        would dominate. Returns the number of records indexed.
+        """
+        indexed = 0
+        while True:
+            with self.db.writer() as conn:
+                rows = index_unsigned_sources(conn, self.min_hasher)
+            if not rows:
+                break
+            indexed += rows
+        if indexed:
+            logger.info(f"Indexed {indexed} source records for near-duplicate search")
+        return indexed
+    
+    def find_merge_candidates(self, threshold: float = 0.6) -> List[MergeCandidate]:
+        """Near-duplicate startups worth merging, most similar first"""
+        self.index_source_records()
+        with self.db.reader() as conn:
+            return find_merge_candidates(conn, threshold)
+    
+    def merge_entities(self, keep_key: str, merged_key: str, reason: str = 'manual',
+                       score: Optional[float] = None) -> int:
+        """Fold one startup entity into another, recording the merge"""
+        with self.db.writer() as conn:
+            return merge_entities(conn, keep_key, merged_key, reason, score)
+    
+    def revenue_history(self, startup_id: int) -> pd.DataFrame:
+        """Revenue data points tracked for one startup, oldest first"""
+        with self.db.reader() as conn:
+            return pd.read_sql_query(REVENUE_HISTORY_QUERY, conn, params=(startup_id,))
+    
+    def export_data(self, format: str = 'json', compress: bool = False, chunk_size: int = EXPORT_CHUNK_SIZE,
+                    since: Optional[int] = None) -> Tuple[str, int]:
+        """Stream startups to a file in the specified format, returning ``(filename, next_token)``
         
-        # Get all startup data
-        query = '''
-        SELECT * FROM startups
-        ORDER BY created_at DESC
-        '''
+        Rows are read from an index ``chunk_size`` at a time and written as they
+        arrive, so memory stays flat however large the table is. Formats are
+        json (a single array), ndjson, csv and parquet (a row group per chunk;
+        needs pyarrow). ``compress`` gzips the text formats and picks gzip over
+        snappy for Parquet.
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        Without ``since`` every startup is exported, newest first. With a token
+        from an earlier export, only startups inserted, updated or deleted after
+        it are written, in change order, with ``change_seq`` and ``change_op``
+        columns; deletions appear as ``delete`` rows carrying only id and name.
+        Either way the returned token marks where the next delta starts.
+        """
+        format = format.lower()
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Supported formats: {', '.join(EXPORT_FORMATS)}")
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = (f"startup_data_{timestamp}.{format}" if since is None
+                    else f"startup_changes_{since}_{timestamp}.{format}")
+        if compress and format != 'parquet':
+            filename += '.gz'
         
-        if format.lower() == 'json':
-            filename = f"startup_data_{timestamp}.json"
-            df.to_json(filename, orient='records', indent=2)
-        elif format.lower() == 'csv':
-            filename = f"startup_data_{timestamp}.csv"
-            df.to_csv(filename, index=False)
-        else:
-            raise ValueError("Supported formats: json, csv")
+        started = time.perf_counter()
+        with self.db.reader() as conn:
+            # One read transaction, so the token matches exactly the rows exported
+            conn.execute("BEGIN")
+            next_token = conn.execute(MAX_CHANGE_SEQ_QUERY).fetchone()[0]
+            if since is None:
+                cursor = conn.execute(EXPORT_QUERY)
+            else:
+                cursor = conn.execute(CHANGES_SINCE_QUERY, {'since': since})
+                next_token = max(next_token, since)
+            columns = [description[0] for description in cursor.description]
+            chunks = iter(lambda: cursor.fetchmany(chunk_size), [])
+            
+            if format == 'parquet':
+                rows = _write_parquet_export(filename, columns, chunks, 'gzip' if compress else 'snappy')
+            else:
+                opener = gzip.open if compress else open
+                with opener(filename, 'wt', encoding='utf-8', newline='') as f:
+                    rows = _write_text_export(f, format, columns, chunks)
         
-        logger.info(f"Data exported to {filename}")
-        return filename
+        elapsed = time.perf_counter() - started
+        self.last_export_stats = {
+            'filename': filename,
+            'rows': rows,
+            'bytes': os.path.getsize(filename),
+            'seconds': elapsed,
+            'rows_per_second': rows / elapsed if elapsed > 0 else 0.0,
+            'since': since,
+            'next_token': next_token
+        }
+        logger.info(f"Data exported to {filename}: {rows:,} rows, {self.last_export_stats['bytes']:,} bytes "
+                    f"in {elapsed:.2f}s ({self.last_export_stats['rows_per_second']:,.0f} rows/s), "
+                    f"next token {next_token}")
+        return filename, next_token
     
-    async def run_analysis(self):
+    async def run_analysis(self, full_resync: bool = False):
         """Run complete startup analysis pipeline"""
         logger.info("Starting startup analysis pipeline...")
         
-        # Collect data from all sources
-        startups = await self.collect_startup_data()
-        
-        # Save to database
-        if startups:
-            self.save_startup_data(startups)
+        # Collect data from all sources, saving it as it arrives
+        startups_collected = await self.ingest_startup_data(full_resync)
         
         # Generate analysis
-        industry_trends = self.analyze_industry_trends()
-        revenue_insights = self.generate_revenue_insights()
+        analytics = self.compute_analytics()
         
         # Save analysis results
         analysis_results = {
             'collection_date': datetime.now().isoformat(),
-            'startups_collected': len(startups),
-            'industry_trends': industry_trends,
-            'revenue_insights': revenue_insights
+            'startups_collected': startups_collected,
+            'industry_trends': analytics['industry_trends'],
+            'revenue_insights': analytics['revenue_insights']
         }
         
         # Export results
@@ -406,10 +1195,18 @@ class StartupTracker:
 
 def main():
     """Main function to run the startup tracker"""
+    parser = argparse.ArgumentParser(description="Startup Revenue Insights Tracker")
+    parser.add_argument('--full-resync', action='store_true',
+                        help="ignore stored watermarks and re-collect every source from scratch")
+    parser.add_argument('--export', choices=EXPORT_FORMATS, help="also export every startup in this format")
+    parser.add_argument('--gzip', action='store_true', help="compress the export")
+    parser.add_argument('--since', type=int, help="export only changes after this token from an earlier export")
+    args = parser.parse_args()
+    
     tracker = StartupTracker()
     
     # Run async analysis
-    results = asyncio.run(tracker.run_analysis())
+    results = asyncio.run(tracker.run_analysis(full_resync=args.full_resync))
     
     print("=" * 50)
     print("STARTUP REVENUE INSIGHTS TRACKER")
@@ -426,6 +1223,11 @@ def main():
         if stage['avg_revenue']:
             print(f"  {stage['stage']}: ${stage['avg_revenue']:,.0f} average revenue")
     
+    if args.export:
+        filename, next_token = tracker.export_data(args.export, compress=args.gzip, since=args.since)
+        print(f"\nExported {tracker.last_export_stats['rows']:,} startups to {filename} "
+              f"(next export: --since {next_token})")
+    
     print("\nData exported and analysis complete!")
 
 if __name__ == "__main__":
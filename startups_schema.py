@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Normalized storage for startups
+Low-cardinality text lives in lookup tables and dates are integer day numbers; a `startups` view keeps the old shape
+"""
+
+import logging
+import sqlite3
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from change_log import create_change_log
+
+logger = logging.getLogger(__name__)
+
+# startups column -> lookup table holding its distinct values
+LOOKUP_TABLES = {
+    'industry': 'industries',
+    'stage': 'stages',
+    'source': 'sources',
+    'revenue_model': 'revenue_models',
+    'location': 'locations',
+}
+
+# startups column -> startups_data column holding it as days since 1970-01-01
+DAY_COLUMNS = {
+    'founded_date': 'founded_day',
+    'last_updated': 'last_updated_day',
+}
+
+def stored_column(column: str) -> str:
+    """Name of the startups_data column that stores a startups view column"""
+    if column in LOOKUP_TABLES:
+        return f"{column}_id"
+    return DAY_COLUMNS.get(column, column)
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+JULIAN_EPOCH = 2440587.5  # julianday('1970-01-01')
+
+STARTUPS_DATA_TABLE = '''
+CREATE TABLE IF NOT EXISTS startups_data (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    industry_id INTEGER REFERENCES industries (id),
+    founded_day INTEGER,
+    revenue_estimate REAL,
+    growth_rate REAL,
+    funding_raised REAL,
+    employee_count INTEGER,
+    revenue_model_id INTEGER REFERENCES revenue_models (id),
+    last_updated_day INTEGER,
+    source_id INTEGER REFERENCES sources (id),
+    stage_id INTEGER REFERENCES stages (id),
+    location_id INTEGER REFERENCES locations (id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    entity_key TEXT
+)
+'''
+
+# Kept apart from the table definition so the uniqueness rule can change without a rebuild.
+# Startups are unique per resolved entity (see entity_resolution.py); names may repeat
+ENTITY_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_startups_data_entity ON startups_data (entity_key)"
+RETIRED_UNIQUE_INDEXES = ['idx_startups_data_name']
+
+def _day_to_date(column: str) -> str:
+    return f"date(s.{column} + {JULIAN_EPOCH})"
+
+def _date_to_day(column: str) -> str:
+    return f"CAST(julianday({column}) - {JULIAN_EPOCH} AS INTEGER)"
+
+def startups_select(indexed_by: Optional[str] = None) -> str:
+    """The startups view's SELECT, optionally reading startups_data through a named index"""
+    return f'''
+SELECT s.id, s.name,
+       industry.name as industry,
+       {_day_to_date('founded_day')} as founded_date,
+       s.revenue_estimate, s.growth_rate, s.funding_raised, s.employee_count,
+       revenue_model.name as revenue_model,
+       {_day_to_date('last_updated_day')} as last_updated,
+       source.name as source,
+       stage.name as stage,
+       location.name as location,
+       s.created_at
+FROM startups_data s{f" INDEXED BY {indexed_by}" if indexed_by else ""}
+{chr(10).join(f"LEFT JOIN {table} {column} ON {column}.id = s.{column}_id" for column, table in LOOKUP_TABLES.items())}
+'''
+
+STARTUPS_VIEW = f"\nCREATE VIEW IF NOT EXISTS startups AS{startups_select()}"
+
+def to_day(value: Optional[str]) -> Optional[int]:
+    """Day number of an ISO date (or timestamp) string; None if missing or unparseable"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10]).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return None
+
+def create_normalized_schema(conn: sqlite3.Connection):
+    """Create the lookup tables and startups_data"""
+    for table in LOOKUP_TABLES.values():
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    conn.execute(STARTUPS_DATA_TABLE)
+
+def add_entity_key(conn: sqlite3.Connection):
+    """Make startups unique by entity_key rather than by name"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(startups_data)")}
+    if 'entity_key' not in columns:
+        # Existing rows get keys from the entity resolution backfill
+        conn.execute("ALTER TABLE startups_data ADD COLUMN entity_key TEXT")
+    for name in RETIRED_UNIQUE_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.execute(ENTITY_INDEX)
+
+def has_legacy_startups(conn: sqlite3.Connection) -> bool:
+    """Whether ``startups`` is still the original table rather than the compatibility view"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'startups'"
+    ).fetchone() is not None
+
+def create_startups_view(conn: sqlite3.Connection):
+    conn.execute(STARTUPS_VIEW)
+
+def resolve_lookup_ids(conn: sqlite3.Connection, column: str, values: Iterable[Optional[str]],
+                       cache: Dict[str, int]) -> Dict[str, int]:
+    """Map the distinct values of a lookup column to ids, adding unseen values; ``cache`` is updated"""
+    missing = {value for value in values if value is not None and value not in cache}
+    if missing:
+        table = LOOKUP_TABLES[column]
+        conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(value,) for value in missing])
+        for value_id, value in conn.execute(
+            f"SELECT id, name FROM {table} WHERE name IN ({', '.join('?' * len(missing))})", list(missing)
+        ):
+            cache[value] = value_id
+    return cache
+
+def normalize_rows(conn: sqlite3.Connection, columns: Sequence[str], rows: List[Sequence],
+                   caches: Dict[str, Dict[str, int]]) -> List[tuple]:
+    """Convert rows in startups view columns into startups_data values"""
+    converted = []
+    for column, values in zip(columns, zip(*rows)):
+        if column in LOOKUP_TABLES:
+            ids = resolve_lookup_ids(conn, column, values, caches.setdefault(column, {}))
+            converted.append([None if value is None else ids[value] for value in values])
+        elif column in DAY_COLUMNS:
+            converted.append([to_day(value) for value in values])
+        else:
+            converted.append(values)
+    return list(zip(*converted))
+
+# Copies legacy startups rows with ids in (?, ?] into startups_data, keeping their ids
+_COPY_COLUMNS = ['id', 'name', 'industry', 'founded_date', 'revenue_estimate', 'growth_rate', 'funding_raised',
+                 'employee_count', 'revenue_model', 'last_updated', 'source', 'stage', 'location', 'created_at']
+
+def _copy_select(where: str) -> str:
+    def value(column: str) -> str:
+        if column in LOOKUP_TABLES:
+            return f"(SELECT id FROM {LOOKUP_TABLES[column]} WHERE name = legacy.{column})"
+        if column in DAY_COLUMNS:
+            return _date_to_day(f"legacy.{column}")
+        return f"legacy.{column}"
+    return f'''
+    INSERT OR REPLACE INTO startups_data ({', '.join(stored_column(column) for column in _COPY_COLUMNS)})
+    SELECT {', '.join(value(column) for column in _COPY_COLUMNS)}
+    FROM startups legacy
+    WHERE {where}
+    '''
+
+def _add_lookup_values(conn: sqlite3.Connection, where: str, params: Sequence):
+    for column, table in LOOKUP_TABLES.items():
+        conn.execute(f'''
+        INSERT OR IGNORE INTO {table} (name)
+        SELECT DISTINCT {column} FROM startups legacy WHERE {where} AND {column} IS NOT NULL
+        ''', params)
+
+def _meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    # Databases from before versioning have no schema_meta until migration 1 runs
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_meta'").fetchone() is None:
+        return None
+    row = conn.execute("SELECT value FROM schema_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def start_legacy_copy(conn: sqlite3.Connection):
+    """Start capturing writes to a legacy ``startups`` table and fix the id range the copy covers
+
+    Rows inserted later are brought over from the startup_changes log by
+    finish_legacy_copy, together with updates and deletes.
+    """
+    if not has_legacy_startups(conn):
+        return
+    create_change_log(conn, 'startups')
+    start_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM startup_changes").fetchone()[0]
+    end_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM startups").fetchone()[0]
+    conn.executemany("INSERT OR REPLACE INTO schema_meta (key, value) VALUES (?, ?)",
+                     [('legacy_copy_start_seq', str(start_seq)), ('legacy_copy_end_id', str(end_id))])
+    logger.info(f"Copying legacy startups up to id {end_id:,} into startups_data")
+
+def legacy_rows_remaining(conn: sqlite3.Connection, after_id: int) -> int:
+    """Legacy startups the copy has yet to reach"""
+    if not has_legacy_startups(conn):
+        return 0
+    end_id = _meta(conn, 'legacy_copy_end_id')
+    return conn.execute("SELECT COUNT(*) FROM startups WHERE id > ? AND id <= ?",
+                        (after_id, int(end_id) if end_id else (1 << 62))).fetchone()[0]
+
+def copy_legacy_chunk(conn: sqlite3.Connection, after_id: int, limit: int) -> Optional[Tuple[int, int]]:
+    """Copy up to ``limit`` legacy startups past ``after_id``, keeping their ids
+
+    Returns the last id copied and the number of rows, or None once the copy is done.
+    """
+    if not has_legacy_startups(conn):
+        return None
+    end_id = int(_meta(conn, 'legacy_copy_end_id') or 0)
+    batch_end = conn.execute(
+        "SELECT MAX(id) FROM (SELECT id FROM startups WHERE id > ? AND id <= ? ORDER BY id LIMIT ?)",
+        (after_id, end_id, limit)
+    ).fetchone()[0]
+    if batch_end is None:
+        return None
+    where = "legacy.id > ? AND legacy.id <= ?"
+    _add_lookup_values(conn, where, (after_id, batch_end))
+    return batch_end, conn.execute(_copy_select(where), (after_id, batch_end)).rowcount
+
+def finish_legacy_copy(conn: sqlite3.Connection):
+    """Replay changes made during the copy, then swap the legacy table for the startups view
+
+    Runs in one transaction, so no legacy write lands between reading the
+    log and dropping the table.
+    """
+    if has_legacy_startups(conn):
+        start_seq = int(_meta(conn, 'legacy_copy_start_seq') or 0)
+        changes = conn.execute(
+            "SELECT startup_id, op FROM startup_changes WHERE seq > ? ORDER BY seq", (start_seq,)
+        ).fetchall()
+        for startup_id, op in changes:
+            if op == 'delete':
+                conn.execute("DELETE FROM startups_data WHERE id = ?", (startup_id,))
+            else:
+                _add_lookup_values(conn, "legacy.id = ?", (startup_id,))
+                conn.execute(_copy_select("legacy.id = ?"), (startup_id,))
+
+        # Dropping the table drops its indexes and triggers; rollups keyed by text are rebuilt by id
+        conn.execute("DROP TABLE startups")
+        conn.execute("DROP TABLE IF EXISTS industry_stage_rollups")
+        conn.execute("DELETE FROM schema_meta WHERE key IN ('legacy_copy_start_seq', 'legacy_copy_end_id')")
+        logger.info(f"Caught up {len(changes):,} changes made during the copy; startups is now a view")
+    create_startups_view(conn)